@@ -755,7 +755,7 @@ async def handle_chat_with_audio(websocket: WebSocket, data: dict, chat_service,
                     total_audio_size += len(audio_chunk)
                     
                     # Convert to base64 for JSON transmission
-                    audio_base64 = base64.b64encode(audio_chunk).decode('utf-8')
+                    audio_base64 = base64.b64encode(audio_chunk).decode('ascii')
                     
                     # Send chunk immediately
                     await websocket.send_json({
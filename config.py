@@ -97,6 +97,8 @@ AUDIO_TTS_PROVIDER = os.getenv("AUDIO_TTS_PROVIDER", "elevenlabs")
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 5003))
 DEBUG = os.getenv("DEBUG", "True").lower() == "true"
+# Run the WebSocket server on uvloop when it is installed
+USE_UVLOOP = os.getenv("USE_UVLOOP", "True").lower() == "true"
 
 # --- Supported Languages ---
 SUPPORTED_LANGUAGES = [
@@ -92,7 +92,9 @@ def main():
         print("=" * 60)
 
         print("\n🌐 Starting WebSocket server...")
-        asyncio.run(start_websocket_server_async(websocket_host, websocket_port))
+        # run_event_loop picks uvloop when installed and USE_UVLOOP is set
+        from websocket_server import run_event_loop
+        run_event_loop(start_websocket_server_async(websocket_host, websocket_port))
 
     except KeyboardInterrupt:
         print("\n🛑 Shutting down servers...")
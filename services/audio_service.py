@@ -183,6 +183,19 @@ class AudioService:
                         # Return empty generator
                         return
     
+    def prewarm_stream(self) -> None:
+        """
+        Open the streaming TTS connection ahead of time (e.g. while the LLM is
+        still answering). Only ElevenLabs keeps a connection; Sarvam is a no-op.
+        """
+        if self.tts_provider == "elevenlabs" and self.elevenlabs_service:
+            self.elevenlabs_service.prewarm()
+    
+    async def disconnect(self):
+        """Close any TTS connection opened by prewarm_stream() but never used."""
+        if self.elevenlabs_service:
+            await self.elevenlabs_service.disconnect()
+    
     def _is_client_disconnected(self, websocket) -> bool:
         """Check if WebSocket client is disconnected."""
         try:
@@ -10,6 +10,7 @@ import logging
 from typing import Optional, AsyncGenerator
 import websockets
 from websockets.exceptions import ConnectionClosed
+from websockets.protocol import State
 import config
 import requests
 import io
@@ -28,6 +29,8 @@ class ElevenLabsService:
         self.voice_id = getattr(config, "ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")
         self.model = getattr(config, "ELEVENLABS_MODEL", "eleven_flash_v2_5")
         self.websocket = None
+        # Streaming connection opened ahead of time by prewarm()
+        self._warm_connection: Optional[asyncio.Task] = None
         
         if self.api_key:
             logger.info("✅ ElevenLabs TTS Service initialized")
@@ -39,6 +42,50 @@ class ElevenLabsService:
         """Check if ElevenLabs is enabled (API key present)."""
         return bool(self.api_key)
     
+    async def _connect(self):
+        """Open a stream-input WebSocket to ElevenLabs."""
+        # Use the Multi-Context WebSocket endpoint with explicit output format
+        url = (
+            f"wss://api.elevenlabs.io/v1/text-to-speech/{self.voice_id}/multi-stream-input"
+            f"?model_id={self.model}&output_format=mp3_44100_128&optimize_streaming_latency=3&auto_mode=true"
+        )
+        return await websockets.connect(
+            url,
+            additional_headers={"xi-api-key": self.api_key},
+            max_size=16 * 1024 * 1024,
+            ping_interval=25,
+            ping_timeout=15,
+        )
+    
+    def prewarm(self) -> None:
+        """
+        Start opening the streaming WebSocket in the background, so the next
+        text_to_speech_stream call skips the connect/TLS handshake.
+        """
+        if not self.enabled or self._warm_connection is not None:
+            return
+        self._warm_connection = asyncio.create_task(self._connect())
+    
+    async def _take_warm_connection(self):
+        """Return the prewarmed connection if it is still open, else None."""
+        task, self._warm_connection = self._warm_connection, None
+        if task is None:
+            return None
+        
+        try:
+            ws = await task
+        except Exception as e:
+            logger.warning(f"⚠️ ElevenLabs prewarm failed, connecting again: {e}")
+            return None
+        
+        if ws.state is not State.OPEN:
+            # Closed while idle (e.g. server inactivity timeout)
+            await ws.close()
+            return None
+        
+        logger.debug("♨️ Using prewarmed ElevenLabs connection")
+        return ws
+    
     async def text_to_speech_stream(self, text: str) -> AsyncGenerator[bytes, None]:
         """
         Convert text to speech and stream audio chunks using a fresh ElevenLabs
@@ -54,20 +101,12 @@ class ElevenLabsService:
             logger.warning("⚠️ ElevenLabs disabled - no API key")
             return
         
-        # Use the Multi-Context WebSocket endpoint with explicit output format
-        url = (
-            f"wss://api.elevenlabs.io/v1/text-to-speech/{self.voice_id}/multi-stream-input"
-            f"?model_id={self.model}&output_format=mp3_44100_128&optimize_streaming_latency=3&auto_mode=true"
-        )
-
         try:
-            async with websockets.connect(
-                url,
-                additional_headers={"xi-api-key": self.api_key},
-                max_size=16 * 1024 * 1024,
-                ping_interval=25,
-                ping_timeout=15,
-            ) as ws:
+            ws = await self._take_warm_connection()
+            if ws is None:
+                ws = await self._connect()
+            
+            async with ws:
                 # Initial context configuration
                 context_id = "conv_1"
                 init_msg = {
@@ -193,6 +232,18 @@ class ElevenLabsService:
     
     async def disconnect(self):
         """Disconnect from WebSocket (if persistent connection used)."""
-        # Persistent WS is no longer used; nothing to do.
+        # Only a prewarmed, not yet used connection can be left open
+        task, self._warm_connection = self._warm_connection, None
+        if task is not None:
+            task.cancel()
+            try:
+                ws = await task
+                await ws.close()
+            except asyncio.CancelledError:
+                # Only swallow the warm task's own cancellation, not ours
+                if asyncio.current_task().cancelling():
+                    raise
+            except Exception:
+                pass
         self.websocket = None
         logger.debug("🔌 ElevenLabs disconnected")
@@ -0,0 +1,87 @@
+"""
+Regression tests for the connection monitoring utilities.
+
+Run with: python -m pytest -q test_connection_monitor.py
+"""
+
+import asyncio
+
+import orjson
+
+from utils.connection_monitor import (
+    ConnectionStateMonitor,
+    get_aggregate_metrics,
+    get_connection_status,
+    send_chunk_safely,
+)
+
+
+class FakeWebSocket:
+    """Minimal open connection that records sent frames."""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+def test_send_chunk_safely_stamps_and_records_chunks():
+    async def run():
+        websocket = FakeWebSocket()
+        monitor = ConnectionStateMonitor("client")
+
+        assert await send_chunk_safely(websocket, {"type": "text_chunk", "text": "hi"}, "client", monitor)
+        assert await send_chunk_safely(websocket, {"type": "text_chunk", "text": "there"}, "client", monitor)
+        assert [orjson.loads(frame)["seq"] for frame in websocket.sent] == [0, 1]
+        assert monitor.chunks_sent == 2
+        assert monitor.bytes_sent == sum(map(len, websocket.sent))
+
+    asyncio.run(run())
+
+
+def test_send_chunk_safely_skips_closed_connection():
+    async def run():
+        websocket = FakeWebSocket()
+        websocket.closed = True
+
+        assert not await send_chunk_safely(websocket, {"type": "text_chunk", "text": "hi"}, "client")
+        assert websocket.sent == []
+
+    asyncio.run(run())
+
+
+def test_recorded_disconnections_are_classified():
+    monitor = ConnectionStateMonitor("client")
+
+    monitor.record_disconnection(Exception("gone"), normal=False)
+    monitor.record_disconnection(Exception("going away"))
+
+    metrics = monitor.get_metrics()
+    assert metrics["error_disconnections"] == 1
+    assert metrics["normal_disconnections"] == 1
+
+
+def test_connection_status_reports_unknown_non_int_state():
+    class StringStateWebSocket:
+        state = "OPEN"
+        closed = False
+
+    status = get_connection_status(StringStateWebSocket(), "client")
+    assert status["state"] == "UNKNOWN(OPEN)"
+    assert "error" not in status
+
+
+def test_released_monitor_leaves_aggregate_metrics():
+    before = get_aggregate_metrics()
+    monitor = ConnectionStateMonitor("client")
+    monitor.record_chunk_sent(100)
+
+    during = get_aggregate_metrics()
+    assert during["active_monitors"] == before["active_monitors"] + 1
+    assert during["bytes_sent"] == before["bytes_sent"] + 100
+
+    monitor.release()
+    monitor.release()
+    assert get_aggregate_metrics() == before
@@ -3,15 +3,42 @@ Test Script for Parallel Course Generation
 Tests uploading multiple PDFs and monitors their parallel processing
 """
 
+import sys
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
 import time
-import json
 from pathlib import Path
 from datetime import datetime
 
 # Configuration
 API_URL = "http://localhost:5003"
 
+# Shared session so uploads and status polls reuse keep-alive connections
+SESSION = requests.Session()
+# Advertise every encoding urllib3 can decode here (adds br/zstd when installed)
+SESSION.headers.update({
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive'
+})
+# Larger pool for monitoring many tasks; retry transient backend errors on
+# status polls only (uploads are not idempotent and the stream can't rewind)
+_retry = Retry(
+    total=3,
+    backoff_factor=0.3,
+    status_forcelist=(500, 502, 503, 504),
+    allowed_methods=frozenset(['GET'])
+)
+_adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=_retry)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+
+# Seconds a successful health check is reused before the API is probed again
+HEALTH_CACHE_TTL = 10
+
 # Replace these with your actual PDF file paths
 PDF_FILES = [
     r"C:\Users\Lenovo\Downloads\ai basic.pdf",
@@ -30,15 +57,21 @@ def upload_pdf(file_path, course_title, priority=5):
     
     try:
         with open(file_path, 'rb') as f:
-            files = {'files': (Path(file_path).name, f, 'application/pdf')}
-            data = {
+            # MultipartEncoder streams the file body instead of buffering it in memory
+            encoder = MultipartEncoder(fields={
+                'files': (Path(file_path).name, f, 'application/pdf'),
                 'course_title': course_title,
-                'priority': priority
-            }
+                'priority': str(priority)
+            })
             
-            response = requests.post(url, files=files, data=data, timeout=30)
+            response = SESSION.post(
+                url,
+                data=encoder,
+                headers={'Content-Type': encoder.content_type},
+                timeout=30
+            )
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
     except FileNotFoundError:
         print(f"❌ Error: File not found: {file_path}")
         return None
@@ -54,9 +87,9 @@ def check_status(task_id):
     """Check status of a task"""
     url = f"{API_URL}/api/jobs/{task_id}"
     try:
-        response = requests.get(url, timeout=10)
+        response = SESSION.get(url, timeout=10)
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     except Exception as e:
         print(f"⚠️  Error checking status: {e}")
         return None
@@ -65,20 +98,30 @@ def get_worker_stats():
     """Get worker statistics"""
     url = f"{API_URL}/api/worker-stats"
     try:
-        response = requests.get(url, timeout=10)
+        response = SESSION.get(url, timeout=10)
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     except Exception as e:
         print(f"⚠️  Error getting worker stats: {e}")
         return None
 
+_health_cache = {'ts': 0.0, 'ok': False}
+
 def check_api_health():
-    """Check if API is running"""
+    """Check if API is running (a healthy result is cached for HEALTH_CACHE_TTL seconds)"""
+    now = time.time()
+    if _health_cache['ok'] and now - _health_cache['ts'] < HEALTH_CACHE_TTL:
+        return True
+    
     try:
-        response = requests.get(f"{API_URL}/health", timeout=5)
-        return response.status_code == 200
+        response = SESSION.get(f"{API_URL}/health", timeout=5)
+        ok = response.status_code == 200
     except:
-        return False
+        ok = False
+    
+    # Failures aren't cached, so one transient error doesn't report the API down for a whole TTL
+    _health_cache.update(ts=now, ok=ok)
+    return ok
 
 def test_single_upload():
     """Test uploading a single PDF"""
@@ -149,18 +192,19 @@ def test_parallel_upload():
     
     # Upload all PDFs
     tasks = []
-    start_time = time.time()
+    start_time = time.monotonic()
     
     for i, pdf_path in enumerate(valid_files):
-        print(f"📤 Uploading: {Path(pdf_path).name}")
+        name = Path(pdf_path).name
+        print(f"📤 Uploading: {name}")
         result = upload_pdf(pdf_path, f"Parallel Course {i+1}", priority=5+i)
         
         if result:
             tasks.append({
-                'file': Path(pdf_path).name,
+                'file': name,
+                'label': f"{name[:30]:30}",
                 'task_id': result['task_id'],
-                'job_id': result['job_id'],
-                'completed': False
+                'job_id': result['job_id']
             })
             print(f"   ✅ Task ID: {result['task_id']}\n")
         else:
@@ -170,51 +214,65 @@ def test_parallel_upload():
         print("❌ No tasks were submitted successfully")
         return
     
-    upload_time = time.time() - start_time
+    upload_time = time.monotonic() - start_time
     print(f"📊 Submitted {len(tasks)} tasks in {upload_time:.2f} seconds")
     print(f"\n⏳ Monitoring parallel processing...\n")
     
-    # Monitor all tasks
-    completed = 0
+    # Monitor all tasks - only unfinished ones are polled each tick
+    pending = {t['task_id']: t for t in tasks}
     last_update = {}
     
-    while completed < len(tasks):
-        for task in tasks:
-            if task.get('completed'):
-                continue
-            
-            status = check_status(task['task_id'])
+    while pending:
+        # Collect this tick's output and emit it with a single write
+        lines = []
+        tick_ts = datetime.now().strftime("%H:%M:%S")
+        
+        for task_id, task in list(pending.items()):
+            status = check_status(task_id)
             
             if not status:
                 continue
             
             state = status.get('status')
             progress = status.get('progress', 0)
+            
+            # Nothing to report (or finalize) unless the status changed
+            current_status = (state, progress)
+            if last_update.get(task_id) == current_status:
+                continue
+            last_update[task_id] = current_status
+            
             message = status.get('message', 'Processing...')
+            lines.append(f"[{tick_ts}] {task['label']} | {state:12} | {progress:3}% | {message[:40]}")
             
-            # Only print if status changed
-            current_status = f"{state}:{progress}"
-            if last_update.get(task['task_id']) != current_status:
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                print(f"[{timestamp}] {task['file'][:30]:30} | {state:12} | {progress:3}% | {message[:40]}")
-                last_update[task['task_id']] = current_status
+            if state in ('SUCCESS', 'FAILURE'):
+                # Terminal states never change - keep the final status and stop polling
+                task['final_status'] = status
+                del pending[task_id]
             
             if state == 'SUCCESS':
-                task['completed'] = True
-                completed += 1
                 result = status.get('result', {})
-                print(f"   ✅ Course ID: {result.get('course_id')} | Modules: {result.get('modules')}\n")
+                lines.append(f"   ✅ Course ID: {result.get('course_id')} | Modules: {result.get('modules')}\n")
             elif state == 'FAILURE':
-                task['completed'] = True
-                completed += 1
-                print(f"   ❌ Error: {status.get('error')}\n")
+                lines.append(f"   ❌ Error: {status.get('error')}\n")
+        
+        if lines:
+            sys.stdout.write('\n'.join(lines) + '\n')
+            sys.stdout.flush()
         
-        if completed < len(tasks):
+        if pending:
             time.sleep(3)
     
-    total_time = time.time() - start_time
+    total_time = time.monotonic() - start_time
     print(f"\n🎉 All tasks completed in {total_time:.2f} seconds!")
     print(f"   Average: {total_time/len(tasks):.2f} seconds per course")
+    
+    # Summary is served from the cached terminal statuses - no re-polling
+    succeeded = [t for t in tasks if t['final_status'].get('status') == 'SUCCESS']
+    print(f"   Succeeded: {len(succeeded)} | Failed: {len(tasks) - len(succeeded)}")
+    for task in succeeded:
+        result = task['final_status'].get('result', {})
+        print(f"   • {task['label']} → Course ID {result.get('course_id')}")
 
 def test_worker_stats():
     """Display worker statistics"""
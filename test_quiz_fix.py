@@ -7,24 +7,29 @@ import requests
 import json
 import sys
 
+# Pass --verbose to dump request payloads
+VERBOSE = "--verbose" in sys.argv
+
+QUIZ_GENERATE_URL = "http://127.0.0.1:5001/api/quiz/generate-course"
+
+# Course quiz request (assuming course ID 1 exists)
+PAYLOAD = {
+    "quiz_type": "course",
+    "course_id": "1"
+}
+
 def test_quiz_generation():
     """Test course quiz generation to verify the validation fix"""
     
-    # API endpoint
-    url = "http://127.0.0.1:5001/api/quiz/generate-course"
-    
-    # Test payload
-    payload = {
-        "quiz_type": "course",
-        "course_id": "1"  # Assuming course ID 1 exists
-    }
+    url = QUIZ_GENERATE_URL
     
     try:
         print("🧪 Testing course quiz generation...")
         print(f"📡 Making request to: {url}")
-        print(f"📦 Payload: {json.dumps(payload, indent=2)}")
+        if VERBOSE:
+            print(f"📦 Payload: {json.dumps(PAYLOAD, indent=2)}")
         
-        response = requests.post(url, json=payload, timeout=30)
+        response = requests.post(url, json=PAYLOAD, timeout=30)
         
         print(f"📊 Response Status: {response.status_code}")
         
@@ -78,10 +83,14 @@ def test_quiz_retrieval():
         import os
         quiz_dir = "data/quizzes"
         if os.path.exists(quiz_dir):
-            quiz_files = [f for f in os.listdir(quiz_dir) if f.endswith('.json')]
-            if quiz_files:
+            # Only the first quiz file is needed - stop scanning once found
+            with os.scandir(quiz_dir) as entries:
+                quiz_id = next(
+                    (e.name[:-5] for e in entries if e.is_file() and e.name.endswith('.json')),
+                    None
+                )
+            if quiz_id is not None:
                 # Test retrieving the first quiz
-                quiz_id = quiz_files[0].replace('.json', '')
                 print(f"📋 Testing retrieval of quiz: {quiz_id}")
                 
                 url = f"http://127.0.0.1:5001/api/quiz/{quiz_id}"
@@ -13,11 +13,13 @@ from .connection_monitor import (
     is_client_disconnected,
     should_continue_streaming,
     send_chunk_safely,
+    wait_for_write_credit,
     log_disconnection,
     get_connection_status,
     validate_connection_before_operation,
     ConnectionStateMonitor,
-    create_connection_monitor
+    create_connection_monitor,
+    get_aggregate_metrics
 )
 
 __all__ = [
@@ -28,9 +30,11 @@ __all__ = [
     'is_client_disconnected',
     'should_continue_streaming',
     'send_chunk_safely',
+    'wait_for_write_credit',
     'log_disconnection',
     'get_connection_status',
     'validate_connection_before_operation',
     'ConnectionStateMonitor',
-    'create_connection_monitor'
+    'create_connection_monitor',
+    'get_aggregate_metrics'
 ]
\ No newline at end of file
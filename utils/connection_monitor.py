@@ -8,15 +8,77 @@ with connection validation.
 Requirements addressed: 1.1, 3.1, 4.3
 """
 
+import asyncio
+import itertools
 import logging
-from typing import Optional, Union
-from datetime import datetime
-from websockets.exceptions import ConnectionClosed, ConnectionClosedOK, ConnectionClosedError
-import websockets
+import os
+import re
+import time
+import orjson
+from typing import Any, Callable, Optional
+from datetime import datetime, timedelta
+from weakref import WeakKeyDictionary
+from websockets.exceptions import ConnectionClosed, ConnectionClosedOK
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# orjson options for outgoing chunks (numpy arrays, naive datetimes as UTC)
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+
+# Close codes treated as normal: 1000 (OK) and 1001 (going away)
+_NORMAL_CODES = frozenset((1000, 1001))
+
+# Fallback for exceptions that only carry the close reason in their message
+_NORMAL_CLOSURE_RE = re.compile(r"code\s*=\s*100[01]|going away|normal closure", re.IGNORECASE)
+
+# Connection-state accessor per websocket class, resolved once on first use
+_state_getter_cache: "WeakKeyDictionary[type, Callable[[Any], bool]]" = WeakKeyDictionary()
+
+# Status attributes (state/closed/open) present per websocket class
+_status_fields_cache: "WeakKeyDictionary[type, tuple]" = WeakKeyDictionary()
+
+# WebSocket states indexed by value: CONNECTING=0, OPEN=1, CLOSING=2, CLOSED=3
+_STATE_NAMES = ("CONNECTING", "OPEN", "CLOSING", "CLOSED")
+
+# Base get_connection_status() result; only the volatile fields are filled per call
+_STATUS_TEMPLATE = {
+    "client_id": None,
+    "is_connected": False,
+    "timestamp": "",
+    "state": "unknown",
+    "closed": None,
+    "open": None
+}
+
+# Totals over live monitors for get_aggregate_metrics. A monitor adds to them
+# as it sends and takes its share out again when it is released.
+_active_monitors = 0
+_live_chunks_sent = 0
+_live_bytes_sent = 0
+
+def get_aggregate_metrics() -> dict:
+    """
+    Get totals across every live connection monitor.
+    
+    Returns:
+        dict: Active monitor count and total chunks/bytes sent
+        
+    Requirements: 4.3 - Connection monitoring utilities
+    """
+    return {
+        "active_monitors": _active_monitors,
+        "chunks_sent": _live_chunks_sent,
+        "bytes_sent": _live_bytes_sent
+    }
+
+# Credit window on the transport's own write buffer. Above WRITE_HIGH_WATER
+# buffered bytes the sender drains before writing again (the transport resumes
+# at its low-water mark); a client that doesn't drain within DRAIN_TIMEOUT
+# seconds is considered stuck and closed with 1011.
+WRITE_HIGH_WATER = int(os.getenv("WS_WRITE_HIGH_WATER", str(256 * 1024)))
+DRAIN_TIMEOUT = float(os.getenv("WS_DRAIN_TIMEOUT", "10"))
+
 def is_normal_closure(exception: Exception) -> bool:
     """
     Check if a WebSocket exception represents a normal closure (codes 1000, 1001).
@@ -33,19 +95,14 @@ def is_normal_closure(exception: Exception) -> bool:
         return True
     
     if isinstance(exception, ConnectionClosed):
-        # Check for normal closure codes: 1000 (OK) and 1001 (going away)
-        return exception.code in (1000, 1001)
+        return exception.code in _NORMAL_CODES
+    
+    code = getattr(exception, 'code', None)
+    if code is not None:
+        return code in _NORMAL_CODES
     
     # Check error message for normal closure indicators
-    error_msg = str(exception).lower()
-    normal_indicators = [
-        "code = 1000",
-        "code = 1001", 
-        "going away",
-        "normal closure"
-    ]
-    
-    return any(indicator in error_msg for indicator in normal_indicators)
+    return _NORMAL_CLOSURE_RE.search(str(exception)) is not None
 
 def is_abnormal_disconnection(exception: Exception) -> bool:
     """
@@ -73,10 +130,32 @@ def get_disconnection_emoji(exception: Exception) -> str:
         
     Requirements: 1.1 - Provide clear visual indicators for different disconnection types
     """
-    if is_normal_closure(exception):
-        return "🔌"  # Normal disconnection
-    else:
-        return "❌"  # Error disconnection
+    return "🔌" if is_normal_closure(exception) else "❌"
+
+def _resolve_state_getter(websocket) -> Callable[[Any], bool]:
+    """
+    Pick the connection-state check for this kind of websocket object.
+    
+    Probes the instance (some attributes are only set in __init__) and returns
+    a callable equivalent to checking closed, then state, then open.
+    """
+    has_closed = hasattr(websocket, 'closed')
+    
+    if hasattr(websocket, 'state'):
+        # WebSocket states: CONNECTING=0, OPEN=1, CLOSING=2, CLOSED=3
+        if has_closed:
+            return lambda ws: not ws.closed and ws.state == 1
+        return lambda ws: ws.state == 1
+    
+    if hasattr(websocket, 'open'):
+        if has_closed:
+            return lambda ws: not ws.closed and ws.open
+        return lambda ws: ws.open
+    
+    if has_closed:
+        return lambda ws: not ws.closed
+    
+    return lambda ws: True
 
 def is_client_connected(websocket) -> bool:
     """
@@ -93,23 +172,16 @@ def is_client_connected(websocket) -> bool:
     if not websocket:
         return False
     
+    ws_type = type(websocket)
+    getter = _state_getter_cache.get(ws_type)
+    if getter is None:
+        getter = _state_getter_cache[ws_type] = _resolve_state_getter(websocket)
+    
     try:
-        # Check if WebSocket is closed or closing
-        if hasattr(websocket, 'closed') and websocket.closed:
-            return False
-        
-        if hasattr(websocket, 'state'):
-            # WebSocket states: CONNECTING=0, OPEN=1, CLOSING=2, CLOSED=3
-            return websocket.state == 1  # Only OPEN state is considered connected
+        return getter(websocket)
         
-        # Fallback check for different WebSocket implementations
-        if hasattr(websocket, 'open'):
-            return websocket.open
-        
-        return True
-        
-    except Exception as e:
-        logger.debug(f"Error checking connection state: {e}")
+    except AttributeError as e:
+        logger.debug("Error checking connection state: %s", e)
         return False
 
 def is_client_disconnected(websocket) -> bool:
@@ -140,14 +212,50 @@ def should_continue_streaming(websocket) -> bool:
     """
     return is_client_connected(websocket)
 
-async def send_chunk_safely(websocket, chunk_data: dict, client_id: str = "unknown") -> bool:
+async def wait_for_write_credit(websocket, client_id: str = "unknown") -> bool:
+    """
+    Wait for the transport write buffer to drain when it is above WRITE_HIGH_WATER.
+    
+    Args:
+        websocket: The WebSocket connection
+        client_id: Client identifier for logging
+        
+    Returns:
+        bool: True if sending may continue, False if the client was closed as stuck
+        
+    Requirements: 3.1 - Safe chunk sending with connection validation
+    """
+    transport = getattr(websocket, 'transport', None)
+    if transport is None or transport.get_write_buffer_size() <= WRITE_HIGH_WATER:
+        return True
+    
+    # websockets exposes drain() on the asyncio implementation, _drain() on legacy
+    drain = getattr(websocket, 'drain', None) or getattr(websocket, '_drain', None)
+    if drain is None:
+        return True
+    
+    try:
+        await asyncio.wait_for(drain(), timeout=DRAIN_TIMEOUT)
+        return True
+    except asyncio.TimeoutError:
+        logger.warning("🐌 Client %s stuck - %d bytes not drained in %gs, closing",
+                       client_id, transport.get_write_buffer_size(), DRAIN_TIMEOUT)
+        await websocket.close(code=1011, reason="send buffer not draining")
+        return False
+
+async def send_chunk_safely(websocket, chunk_data: dict, client_id: str = "unknown",
+                            monitor: Optional["ConnectionStateMonitor"] = None) -> bool:
     """
     Safely send a chunk to the WebSocket client with connection validation.
     
+    When a monitor is given the chunk is stamped with the monitor's next "seq"
+    and counted in its send metrics.
+    
     Args:
         websocket: The WebSocket connection
         chunk_data: The data to send as a dictionary
         client_id: Client identifier for logging
+        monitor: Optional connection monitor for this client
         
     Returns:
         bool: True if chunk was sent successfully, False if client disconnected
@@ -155,22 +263,32 @@ async def send_chunk_safely(websocket, chunk_data: dict, client_id: str = "unkno
     Requirements: 3.1 - Safe chunk sending with connection validation
     """
     if not is_client_connected(websocket):
-        logger.info(f"🔌 Client {client_id} already disconnected - skipping chunk")
+        logger.info("🔌 Client %s already disconnected - skipping chunk", client_id)
         return False
     
     try:
-        import json
-        await websocket.send(json.dumps(chunk_data))
+        if monitor is not None:
+            chunk_data["seq"] = next(monitor.next_seq)
+        
+        # Decode to str so clients still receive a text frame they can JSON.parse
+        payload = orjson.dumps(chunk_data, option=_ORJSON_OPTIONS).decode()
+        
+        if not await wait_for_write_credit(websocket, client_id):
+            return False
+        
+        await websocket.send(payload)
+        if monitor is not None:
+            monitor.record_chunk_sent(len(payload))
         return True
         
     except ConnectionClosed as e:
         log_disconnection(client_id, e, "while sending chunk")
         return False
     except Exception as e:
-        logger.error(f"❌ Error sending chunk to {client_id}: {e}")
+        logger.error("❌ Error sending chunk to %s: %s", client_id, e)
         return False
 
-def log_disconnection(client_id: str, exception: Exception, context: str = "") -> None:
+def log_disconnection(client_id: str, exception: Exception, context: str = "") -> bool:
     """
     Log disconnection with appropriate emoji and message.
     
@@ -179,54 +297,67 @@ def log_disconnection(client_id: str, exception: Exception, context: str = "") -
         exception: The disconnection exception
         context: Additional context for the log message
         
+    Returns:
+        bool: True if the disconnection was a normal closure (so callers can reuse it)
+        
     Requirements: 1.1 - Distinguish between normal closures and actual errors in logging
     """
-    emoji = get_disconnection_emoji(exception)
+    normal = is_normal_closure(exception)
+    has_code = hasattr(exception, 'code')
     
-    if is_normal_closure(exception):
-        if hasattr(exception, 'code'):
-            logger.info(f"{emoji} Client {client_id} disconnected normally (code {exception.code}) {context}")
+    if normal:
+        if has_code:
+            logger.info("🔌 Client %s disconnected normally (code %s) %s", client_id, exception.code, context)
         else:
-            logger.info(f"{emoji} Client {client_id} disconnected normally {context}")
+            logger.info("🔌 Client %s disconnected normally %s", client_id, context)
     else:
-        if hasattr(exception, 'code'):
-            logger.warning(f"{emoji} Client {client_id} disconnected with error (code {exception.code}) {context}")
+        if has_code:
+            logger.warning("❌ Client %s disconnected with error (code %s) %s", client_id, exception.code, context)
         else:
-            logger.error(f"{emoji} Client {client_id} disconnected with error: {exception} {context}")
+            logger.error("❌ Client %s disconnected with error: %s %s", client_id, exception, context)
+    
+    return normal
+
+def _resolve_status_fields(websocket) -> tuple:
+    """Pick which of state/closed/open this kind of websocket object exposes."""
+    return tuple(name for name in ("state", "closed", "open") if hasattr(websocket, name))
 
-def get_connection_status(websocket, client_id: str) -> dict:
+def get_connection_status(websocket, client_id: str,
+                          monitor: Optional["ConnectionStateMonitor"] = None) -> dict:
     """
     Get detailed connection status information.
     
     Args:
         websocket: The WebSocket connection
         client_id: Client identifier
+        monitor: Optional connection monitor whose prebuilt status template is reused
         
     Returns:
         dict: Connection status information
         
     Requirements: 4.3 - Detailed diagnostic information for connection issues
     """
-    status = {
-        "client_id": client_id,
-        "is_connected": is_client_connected(websocket),
-        "timestamp": datetime.utcnow().isoformat(),
-        "state": "unknown",
-        "closed": None,
-        "open": None
-    }
+    if monitor is not None:
+        status = monitor._status_template.copy()
+    else:
+        status = _STATUS_TEMPLATE.copy()
+        status["client_id"] = client_id
+    
+    status["is_connected"] = is_client_connected(websocket)
+    status["timestamp"] = datetime.utcnow().isoformat()
     
     if websocket:
+        ws_type = type(websocket)
+        fields = _status_fields_cache.get(ws_type)
+        if fields is None:
+            fields = _status_fields_cache[ws_type] = _resolve_status_fields(websocket)
+        
         try:
-            if hasattr(websocket, 'state'):
-                state_names = {0: "CONNECTING", 1: "OPEN", 2: "CLOSING", 3: "CLOSED"}
-                status["state"] = state_names.get(websocket.state, f"UNKNOWN({websocket.state})")
-            
-            if hasattr(websocket, 'closed'):
-                status["closed"] = websocket.closed
-                
-            if hasattr(websocket, 'open'):
-                status["open"] = websocket.open
+            for name in fields:
+                value = getattr(websocket, name)
+                if name == "state":
+                    value = _STATE_NAMES[value] if isinstance(value, int) and 0 <= value < len(_STATE_NAMES) else f"UNKNOWN({value})"
+                status[name] = value
                 
         except Exception as e:
             status["error"] = str(e)
@@ -248,7 +379,7 @@ def validate_connection_before_operation(websocket, client_id: str, operation: s
     Requirements: 3.1 - Connection state validation before operations
     """
     if not is_client_connected(websocket):
-        logger.info(f"🔌 Client {client_id} disconnected - skipping {operation}")
+        logger.info("🔌 Client %s disconnected - skipping %s", client_id, operation)
         return False
     
     return True
@@ -260,37 +391,89 @@ class ConnectionStateMonitor:
     Requirements: 3.1, 4.3 - Connection state monitoring and diagnostic information
     """
     
+    __slots__ = (
+        "client_id", "connection_start_time", "connection_start_mono", "last_activity_mono",
+        "chunks_sent", "bytes_sent", "normal_disconnections", "error_disconnections", "_released",
+        "coalesced_chunks", "_status_template", "next_seq"
+    )
+    
     def __init__(self, client_id: str):
         self.client_id = client_id
+        # Wall-clock start for reporting; bookkeeping uses the monotonic clock
         self.connection_start_time = datetime.utcnow()
-        self.last_activity = datetime.utcnow()
+        self.connection_start_mono = time.monotonic()
+        self.last_activity_mono = self.connection_start_mono
         self.chunks_sent = 0
         self.bytes_sent = 0
         self.normal_disconnections = 0
         self.error_disconnections = 0
+        
+        # Queued frames superseded by a newer one before they were written
+        self.coalesced_chunks = 0
+        
+        # Static part of get_connection_status() for this client
+        self._status_template = {**_STATUS_TEMPLATE, "client_id": client_id}
+        
+        # Per-message sequence numbers in send order; a gap on the client means
+        # a message was lost
+        self.next_seq = itertools.count()
+        
+        global _active_monitors
+        _active_monitors += 1
+        self._released = False
+    
+    def release(self):
+        """
+        Take this monitor out of get_aggregate_metrics once its connection is
+        cleaned up. Safe to call more than once.
+        """
+        global _active_monitors, _live_chunks_sent, _live_bytes_sent
+        if self._released:
+            return
+        self._released = True
+        _active_monitors -= 1
+        _live_chunks_sent -= self.chunks_sent
+        _live_bytes_sent -= self.bytes_sent
+    
+    @property
+    def last_activity(self) -> datetime:
+        """Wall-clock time of the last activity (derived on read)."""
+        return self.connection_start_time + timedelta(
+            seconds=self.last_activity_mono - self.connection_start_mono
+        )
     
     def update_activity(self):
         """Update last activity timestamp."""
-        self.last_activity = datetime.utcnow()
+        self.last_activity_mono = time.monotonic()
     
-    def record_chunk_sent(self, chunk_size: int):
-        """Record that a chunk was sent successfully."""
-        self.chunks_sent += 1
+    def record_chunk_sent(self, chunk_size: int, count: int = 1):
+        """Record that a chunk (or count chunks totalling chunk_size bytes) was sent successfully."""
+        global _live_chunks_sent, _live_bytes_sent
+        self.chunks_sent += count
         self.bytes_sent += chunk_size
-        self.update_activity()
+        self.last_activity_mono = time.monotonic()
+        if not self._released:
+            _live_chunks_sent += count
+            _live_bytes_sent += chunk_size
     
-    def record_disconnection(self, exception: Exception):
-        """Record a disconnection event."""
-        if is_normal_closure(exception):
+    def record_disconnection(self, exception: Exception, normal: Optional[bool] = None):
+        """Record a disconnection event (pass normal if already classified)."""
+        if normal is None:
+            normal = is_normal_closure(exception)
+        
+        if normal:
             self.normal_disconnections += 1
         else:
             self.error_disconnections += 1
+        
+        # Nothing more will be sent on this connection
+        self.release()
     
     def get_metrics(self) -> dict:
         """Get connection metrics."""
-        now = datetime.utcnow()
-        session_duration = (now - self.connection_start_time).total_seconds()
-        time_since_activity = (now - self.last_activity).total_seconds()
+        now = time.monotonic()
+        session_duration = now - self.connection_start_mono
+        time_since_activity = now - self.last_activity_mono
         
         return {
             "client_id": self.client_id,
@@ -300,7 +483,8 @@ class ConnectionStateMonitor:
             "bytes_sent": self.bytes_sent,
             "normal_disconnections": self.normal_disconnections,
             "error_disconnections": self.error_disconnections,
-            "total_disconnections": self.normal_disconnections + self.error_disconnections
+            "total_disconnections": self.normal_disconnections + self.error_disconnections,
+            "coalesced_chunks": self.coalesced_chunks
         }
     
     def is_healthy_connection(self, max_idle_seconds: int = 300) -> bool:
@@ -313,9 +497,7 @@ class ConnectionStateMonitor:
         Returns:
             bool: True if connection is healthy, False otherwise
         """
-        now = datetime.utcnow()
-        idle_time = (now - self.last_activity).total_seconds()
-        return idle_time <= max_idle_seconds
+        return (time.monotonic() - self.last_activity_mono) <= max_idle_seconds
 
 def create_connection_monitor(client_id: str) -> ConnectionStateMonitor:
     """
@@ -4,6 +4,10 @@ Tests all services to ensure Deepgram/ElevenLabs integration is correct
 """
 
 import asyncio
+import builtins
+import contextvars
+import importlib
+import io
 import logging
 import sys
 from dotenv import load_dotenv
@@ -17,6 +21,38 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+def _try_import(name):
+    """Import a module, returning the exception instead of raising it."""
+    try:
+        return importlib.import_module(name)
+    except Exception as e:
+        return e
+
+def _require(module):
+    """Return a pre-imported module, re-raising its import error if it failed."""
+    if isinstance(module, Exception):
+        raise module
+    return module
+
+# Import everything once up front so concurrent tests don't contend on the
+# import lock; failures are reported by the test that needs the module
+config_module = _try_import("config")
+audio_service_module = _try_import("services.audio_service")
+chat_service_module = _try_import("services.chat_service")
+transcription_service_module = _try_import("services.transcription_service")
+teaching_service_module = _try_import("services.teaching_service")
+deepgram_module = _try_import("services.deepgram_stt_service")
+elevenlabs_module = _try_import("services.elevenlabs_service")
+sarvam_module = _try_import("services.sarvam_service")
+
+# Output buffer of the test running in the current task (None = stdout)
+_test_output = contextvars.ContextVar("test_output", default=None)
+
+def print(*args, **kwargs):
+    """Print to the current test's buffer so concurrent tests don't interleave."""
+    kwargs.setdefault("file", _test_output.get() or sys.stdout)
+    builtins.print(*args, **kwargs)
+
 def print_section(title):
     """Print a formatted section header."""
     print("\n" + "=" * 70)
@@ -35,11 +71,11 @@ async def test_audio_service():
     print_section("TEST 1: Audio Service Integration")
     
     try:
-        from services.audio_service import AudioService
-        import config
+        AudioService = _require(audio_service_module).AudioService
+        config = _require(config_module)
         
-        # Initialize service
-        audio_service = AudioService()
+        # Initialize service off the event loop so other tests keep running
+        audio_service = await asyncio.to_thread(AudioService)
         
         # Check provider selection
         stt_provider = audio_service.stt_provider
@@ -107,10 +143,10 @@ async def test_chat_service():
     print_section("TEST 2: Chat Service (Translation)")
     
     try:
-        from services.chat_service import ChatService
+        ChatService = _require(chat_service_module).ChatService
         
         # Initialize service
-        chat_service = ChatService()
+        chat_service = await asyncio.to_thread(ChatService)
         
         # Test 2.1: Service initialization
         print_result("ChatService Initialization", True)
@@ -141,10 +177,10 @@ async def test_transcription_service():
     print_section("TEST 3: Transcription Service (File-based)")
     
     try:
-        from services.transcription_service import TranscriptionService
+        TranscriptionService = _require(transcription_service_module).TranscriptionService
         
         # Initialize service
-        transcription_service = TranscriptionService()
+        transcription_service = await asyncio.to_thread(TranscriptionService)
         
         # Test 3.1: Service initialization
         print_result("TranscriptionService Initialization", True)
@@ -172,10 +208,10 @@ async def test_teaching_service():
     print_section("TEST 4: Teaching Service (Content Generation)")
     
     try:
-        from services.teaching_service import TeachingService
+        TeachingService = _require(teaching_service_module).TeachingService
         
         # Initialize service
-        teaching_service = TeachingService()
+        teaching_service = await asyncio.to_thread(TeachingService)
         
         # Test 4.1: Service initialization
         print_result("TeachingService Initialization", True)
@@ -202,7 +238,7 @@ async def test_service_imports():
     
     # Test 5.1: Deepgram import
     try:
-        from services.deepgram_stt_service import DeepgramSTTService
+        _require(deepgram_module).DeepgramSTTService
         print_result("Deepgram STT Service Import", True)
         results.append(True)
     except Exception as e:
@@ -211,7 +247,7 @@ async def test_service_imports():
     
     # Test 5.2: ElevenLabs import
     try:
-        from services.elevenlabs_service import ElevenLabsService
+        _require(elevenlabs_module).ElevenLabsService
         print_result("ElevenLabs TTS Service Import", True)
         results.append(True)
     except Exception as e:
@@ -220,7 +256,7 @@ async def test_service_imports():
     
     # Test 5.3: Sarvam import (should still work)
     try:
-        from services.sarvam_service import SarvamService
+        _require(sarvam_module).SarvamService
         print_result("Sarvam Service Import", True, "Still available as fallback")
         results.append(True)
     except Exception as e:
@@ -233,8 +269,7 @@ async def test_configuration():
     """Test configuration values."""
     print_section("TEST 6: Configuration")
     
-    import config
-    import os
+    config = _require(config_module)
     
     print(f"\n🔧 Audio Provider Configuration:")
     
@@ -296,24 +331,42 @@ async def test_logical_correctness():
     
     return True
 
-async def main():
-    """Run all verification tests."""
+async def run_captured(test):
+    """Run a test with its output buffered; exceptions count as a failure."""
+    buffer = io.StringIO()
+    # gather() runs each coroutine in its own Task, so this set is task-local
+    _test_output.set(buffer)
+    try:
+        passed = await test()
+    except Exception as e:
+        print_result(test.__name__, False, str(e))
+        passed = False
+    return passed, buffer.getvalue()
+
+async def run_suite(report):
+    """Run all verification tests, collecting their output into report."""
     print("\n" + "=" * 70)
     print("  🧪 AUDIO MIGRATION VERIFICATION SUITE")
     print("=" * 70)
     print(f"\nVerifying Deepgram + ElevenLabs integration...")
     print(f"Testing all services for correctness and compatibility...")
     
-    # Run all tests
-    results = []
+    # Run all tests concurrently - they are independent of each other
+    outcomes = await asyncio.gather(
+        run_captured(test_service_imports),
+        run_captured(test_configuration),
+        run_captured(test_audio_service),
+        run_captured(test_chat_service),
+        run_captured(test_transcription_service),
+        run_captured(test_teaching_service),
+        run_captured(test_logical_correctness)
+    )
     
-    results.append(await test_service_imports())
-    results.append(await test_configuration())
-    results.append(await test_audio_service())
-    results.append(await test_chat_service())
-    results.append(await test_transcription_service())
-    results.append(await test_teaching_service())
-    results.append(await test_logical_correctness())
+    # Replay each test's output in the original order
+    results = []
+    for passed, output in outcomes:
+        report.write(output)
+        results.append(passed)
     
     # Summary
     print_section("VERIFICATION SUMMARY")
@@ -344,6 +397,16 @@ async def main():
     
     return all(results)
 
+async def main():
+    """Run all verification tests and write the report with a single write."""
+    report = io.StringIO()
+    _test_output.set(report)
+    try:
+        return await run_suite(report)
+    finally:
+        sys.stdout.write(report.getvalue())
+        sys.stdout.flush()
+
 if __name__ == "__main__":
     success = asyncio.run(main())
     sys.exit(0 if success else 1)
@@ -3,21 +3,103 @@
 # Based on Contelligence architecture with optimizations for educational content
 
 import asyncio
+import base64
+import io
+import mmap
+import os
+import socket
+import struct
+import sys
 import threading
 import time
-import json
+import weakref
+from collections import OrderedDict, deque
 import logging
+import orjson
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Optional
 import websockets
-from websockets.exceptions import ConnectionClosed, ConnectionClosedOK, ConnectionClosedError
+from websockets.exceptions import ConnectionClosed, ConnectionClosedOK
 
 # Import ProfAI services
 from services.chat_service import ChatService
 from services.audio_service import AudioService
 from services.teaching_service import TeachingService
+from utils.connection_monitor import create_connection_monitor, wait_for_write_credit
 import config
 
+# uvloop is a faster drop-in event loop (libuv, epoll on Linux); there is no
+# Windows build, so don't try to import it there
+uvloop = None
+if sys.platform != "win32":
+    try:
+        import uvloop
+    except ImportError:
+        pass
+
+# orjson options for outgoing messages (int keys are stringified like json.dumps)
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Optional msgpack wire format (negotiated per connection with set_wire_format)
+try:
+    import msgspec
+    _msgpack_encoder = msgspec.msgpack.Encoder()
+    _msgpack_decoder = msgspec.msgpack.Decoder()
+    MSGPACK_AVAILABLE = True
+    _DECODE_ERRORS = (orjson.JSONDecodeError, msgspec.DecodeError)
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    _DECODE_ERRORS = (orjson.JSONDecodeError,)
+
+# Once a client negotiates msgpack, every frame the server sends is binary and
+# its first byte says what it is:
+#   MSGPACK_FRAME_PREFIX - a msgpack-encoded message (every control message)
+#   AUDIO_FRAME_PREFIX   - an audio frame for the "binary" (raw audio) or
+#                          "compact" (3-byte header + audio) transport
+# With the default JSON wire format, messages are text frames and binary frames
+# are always audio, so audio frames carry no prefix.
+MSGPACK_FRAME_PREFIX = b"\x01"
+AUDIO_FRAME_PREFIX = b"\x02"
+
+WIRE_FORMATS = ("json", "msgpack") if MSGPACK_AVAILABLE else ("json",)
+
+AUDIO_TRANSPORTS = ("base64", "binary", "compact")
+
+# "compact" audio frames: uint16 chunk_id + uint8 flags, then the raw audio
+_COMPACT_AUDIO_HEADER = struct.Struct("!HB")
+AUDIO_FLAG_FIRST_CHUNK = 0x01
+
+# Audio chunks after the first are merged until this many bytes are buffered
+# or the oldest buffered chunk has waited AUDIO_COALESCE_WINDOW seconds
+AUDIO_COALESCE_BYTES = 8192
+AUDIO_COALESCE_WINDOW = 0.005
+
+# Course files larger than this are parsed from an mmap instead of a bytes copy
+MMAP_JSON_THRESHOLD = 1024 * 1024
+
+# Frames a client may have queued for its writer task before send() waits for it
+OUTBOUND_QUEUE_LIMIT = 64
+
+# Message types where only the newest value matters (status/progress updates).
+# A queued, not yet written frame of one of these types is overwritten by the
+# next one instead of queueing behind it; every other type (audio_chunk,
+# text_chunk, ...) is always delivered and waits for the writer when it is full.
+REPLACEABLE_MESSAGE_TYPES = frozenset(("status", "progress"))
+
+# Generated audio-only clips kept for replay, keyed by (text, language):
+# at most this many clips, each no larger than AUDIO_CLIP_CACHE_MAX_BYTES
+AUDIO_CLIP_CACHE_ENTRIES = 32
+AUDIO_CLIP_CACHE_MAX_BYTES = 2 * 1024 * 1024
+_AUDIO_CLIP_CACHE: "OrderedDict[tuple, list]" = OrderedDict()
+
+# Inbound frames (e.g. base64 audio for transcription) larger than this are
+# parsed in a worker thread so other clients' streams aren't stalled
+DECODE_OFFLOAD_BYTES = 64 * 1024
+
+# Unsent bytes the kernel may hold per socket before reporting it unwritable (Linux)
+TCP_NOTSENT_LOWAT_BYTES = 16384
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -29,6 +111,192 @@ def log(*args):
     """Enhanced logging with timestamp"""
     print(f"[{ts()}][WebSocket]", *args, flush=True)
 
+def decode_message(message):
+    """Parse an inbound frame: msgpack frames start with MSGPACK_FRAME_PREFIX, anything else is JSON."""
+    if MSGPACK_AVAILABLE and isinstance(message, bytes) and message[:1] == MSGPACK_FRAME_PREFIX:
+        return _msgpack_decoder.decode(memoryview(message)[1:])
+    return orjson.loads(message)
+
+def _read_json_file(path: str):
+    """Read and parse a JSON file; large files are parsed from an mmap to skip a copy."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= MMAP_JSON_THRESHOLD:
+            return orjson.loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+
+# Parsed course files: path -> (mtime_ns, parsed JSON, {str(course_id): course})
+_COURSE_CACHE: Dict[str, tuple] = {}
+# One lock per event loop: an asyncio.Lock binds to the loop that first waits on it
+_COURSE_LOCKS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+def _course_lock() -> asyncio.Lock:
+    """Return the course-file lock for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    lock = _COURSE_LOCKS.get(loop)
+    if lock is None:
+        lock = _COURSE_LOCKS[loop] = asyncio.Lock()
+    return lock
+
+async def _load_course_file(path: str):
+    """
+    Return (parsed, index) for a course file, re-reading it only when its mtime changes.
+    
+    index maps str(course_id) to the course for the multi-course (list) format
+    and is empty otherwise. Raises OSError if the file can't be read.
+    """
+    mtime_ns = (await asyncio.to_thread(os.stat, path)).st_mtime_ns
+    cached = _COURSE_CACHE.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1], cached[2]
+    
+    async with _course_lock():
+        # Another client may have parsed it while we waited
+        cached = _COURSE_CACHE.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1], cached[2]
+        
+        loaded = await asyncio.to_thread(_read_json_file, path)
+        index = {}
+        if isinstance(loaded, list):
+            for c in loaded:
+                if isinstance(c, dict):
+                    # First course with an id wins, as with a linear scan
+                    index.setdefault(str(c.get("course_id", "")), c)
+        _COURSE_CACHE[path] = (mtime_ns, loaded, index)
+        log(f"Course file parsed: {path}")
+        return loaded, index
+
+def corkable_socket(websocket):
+    """Return the connection's TCP socket if it supports TCP_CORK (Linux), else None."""
+    if not hasattr(socket, "TCP_CORK"):
+        return None
+    transport = getattr(websocket, "transport", None)
+    sock = transport.get_extra_info("socket") if transport is not None else None
+    if sock is None or sock.family not in (socket.AF_INET, socket.AF_INET6):
+        return None
+    return sock
+
+def summarize_audio_frames(sizes, times_ns) -> str:
+    """Summarize sent audio frames: count, min/mean/max size and gap between sends."""
+    if not sizes:
+        return "none sent"
+    summary = (f"{len(sizes)} sent, size min/avg/max "
+               f"{min(sizes)}/{sum(sizes) // len(sizes)}/{max(sizes)} bytes")
+    if len(times_ns) > 1:
+        gaps = [(b - a) / 1e6 for a, b in zip(times_ns, times_ns[1:])]
+        summary += (f", gap min/avg/max "
+                    f"{min(gaps):.1f}/{sum(gaps) / len(gaps):.1f}/{max(gaps):.1f}ms")
+    return summary
+
+def tune_client_socket(websocket):
+    """
+    Set low-latency options on a client's TCP socket.
+    
+    Nagle is disabled so small audio frames go out immediately, and on Linux
+    TCP_NOTSENT_LOWAT keeps unsent data in our queue rather than the kernel's.
+    Buffer sizes are left to kernel autotuning.
+    """
+    transport = getattr(websocket, "transport", None)
+    sock = transport.get_extra_info("socket") if transport is not None else None
+    if sock is None or sock.family not in (socket.AF_INET, socket.AF_INET6):
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if hasattr(socket, "TCP_NOTSENT_LOWAT"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NOTSENT_LOWAT, TCP_NOTSENT_LOWAT_BYTES)
+    except OSError as e:
+        log(f"Could not tune client socket: {e}")
+
+# Marks the end of a stream fed through _pump_stream
+_STREAM_END = object()
+
+async def _pump_stream(stream, queue: asyncio.Queue):
+    """
+    Move stream's items into queue, then _STREAM_END (also when it fails).
+    
+    Runs as one task per stream, so the source generator's body and its
+    cleanup always run in that task.
+    """
+    try:
+        async for item in stream:
+            await queue.put(item)
+    except Exception:
+        await queue.put(_STREAM_END)
+        raise
+    else:
+        await queue.put(_STREAM_END)
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+async def coalesce_audio_chunks(stream):
+    """
+    Merge small audio chunks from stream, yielding (audio_bytes, chunk_ids).
+    
+    The first chunk is yielded on its own so first-audio latency is unchanged;
+    later chunks are buffered up to AUDIO_COALESCE_BYTES or AUDIO_COALESCE_WINDOW.
+    chunk_ids are the 1-based positions of the source chunks in the group.
+    """
+    loop = asyncio.get_running_loop()
+    # A single pump task reads the source; the bounded queue keeps it at most
+    # a chunk ahead, as if it were read directly
+    queue = asyncio.Queue(maxsize=1)
+    pump = asyncio.create_task(_pump_stream(stream, queue))
+    buffer = bytearray()
+    buffered_ids = []
+    next_id = 1
+    deadline = 0.0
+    try:
+        while True:
+            if buffer:
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        audio_chunk = await queue.get()
+                except TimeoutError:
+                    yield bytes(buffer), buffered_ids
+                    buffer.clear()
+                    buffered_ids = []
+                    continue
+            else:
+                audio_chunk = await queue.get()
+            
+            if audio_chunk is _STREAM_END:
+                # Re-raises the source's error, if it failed
+                await pump
+                break
+            
+            if not audio_chunk:
+                continue
+            
+            if next_id == 1:
+                next_id += 1
+                yield audio_chunk, [1]
+                continue
+            
+            if not buffer:
+                deadline = loop.time() + AUDIO_COALESCE_WINDOW
+            buffer += audio_chunk
+            buffered_ids.append(next_id)
+            next_id += 1
+            
+            if len(buffer) >= AUDIO_COALESCE_BYTES:
+                yield bytes(buffer), buffered_ids
+                buffer.clear()
+                buffered_ids = []
+        
+        if buffer:
+            yield bytes(buffer), buffered_ids
+    finally:
+        if not pump.done():
+            pump.cancel()
+            # Let the source unwind and close before returning
+            await asyncio.wait((pump,))
+        if not pump.cancelled():
+            pump.exception()  # Already raised above or superseded by our own exit
+
 def is_normal_closure(exception) -> bool:
     """Check if a WebSocket exception represents a normal closure (codes 1000, 1001)."""
     if isinstance(exception, ConnectionClosedOK):
@@ -38,41 +306,66 @@ def is_normal_closure(exception) -> bool:
         return exception.code in (1000, 1001)
     return False
 
-def get_disconnection_emoji(exception) -> str:
-    """Get appropriate emoji for disconnection type."""
-    if is_normal_closure(exception):
-        return "🔌"  # Normal disconnection
-    else:
-        return "❌"  # Error disconnection
-
-def log_disconnection(client_id: str, exception, context: str = ""):
-    """Log disconnection with appropriate emoji and message."""
-    emoji = get_disconnection_emoji(exception)
-    if is_normal_closure(exception):
-        if hasattr(exception, 'code'):
-            log(f"{emoji} Client {client_id} disconnected normally (code {exception.code}) {context}")
+def log_disconnection(client_id: str, exception, context: str = "") -> bool:
+    """Log disconnection with appropriate emoji and message; returns True for a normal closure."""
+    normal = is_normal_closure(exception)
+    has_code = hasattr(exception, 'code')
+    if normal:
+        if has_code:
+            log(f"🔌 Client {client_id} disconnected normally (code {exception.code}) {context}")
         else:
-            log(f"{emoji} Client {client_id} disconnected normally {context}")
+            log(f"🔌 Client {client_id} disconnected normally {context}")
     else:
-        if hasattr(exception, 'code'):
-            log(f"{emoji} Client {client_id} disconnected with error (code {exception.code}) {context}")
+        if has_code:
+            log(f"❌ Client {client_id} disconnected with error (code {exception.code}) {context}")
         else:
-            log(f"{emoji} Client {client_id} disconnected with error: {exception} {context}")
+            log(f"❌ Client {client_id} disconnected with error: {exception} {context}")
+    return normal
 
-def is_client_connected(websocket) -> bool:
-    """Check if WebSocket client is still connected."""
-    if not websocket:
-        return False
-    
-    # Check if WebSocket is closed or closing
-    if hasattr(websocket, 'closed') and websocket.closed:
-        return False
-    
+def _open_by_closed(websocket) -> bool:
+    return not websocket.closed
+
+def _open_by_state(websocket) -> bool:
+    # WebSocket states: CONNECTING=0, OPEN=1, CLOSING=2, CLOSED=3
+    return websocket.state == 1
+
+def _open_unknown(websocket) -> bool:
+    return True
+
+def connection_probe(websocket):
+    """
+    Pick the open-check for this kind of connection once, so later checks
+    are a single attribute read instead of hasattr probing.
+    """
+    if hasattr(websocket, 'closed'):
+        return _open_by_closed
     if hasattr(websocket, 'state'):
-        # WebSocket states: CONNECTING=0, OPEN=1, CLOSING=2, CLOSED=3
-        return websocket.state == 1  # Only OPEN state is considered connected
+        return _open_by_state
+    # If we can't determine status, assume connected to continue processing
+    return _open_unknown
+
+@dataclass(slots=True)
+class ConversationMetrics:
+    """Per-connection request counters and response timing (kept in ns, reported in s)."""
+    total_requests: int = 0
+    total_response_time_ns: int = 0
+    chat_requests: int = 0
+    audio_requests: int = 0
+    teaching_requests: int = 0
+    errors: int = 0
     
-    return True
+    def to_dict(self) -> dict:
+        """Metrics as reported to clients; the average is only computed here."""
+        total_response_time = self.total_response_time_ns / 1e9
+        return {
+            "total_requests": self.total_requests,
+            "avg_response_time": total_response_time / self.total_requests if self.total_requests else 0.0,
+            "total_response_time": total_response_time,
+            "chat_requests": self.chat_requests,
+            "audio_requests": self.audio_requests,
+            "teaching_requests": self.teaching_requests,
+            "errors": self.errors
+        }
 
 class ProfAIWebSocketWrapper:
     """
@@ -82,44 +375,214 @@ class ProfAIWebSocketWrapper:
         self.websocket = websocket
         self.client_id = client_id
         self.message_count = 0
-        self.last_activity = time.time()
+        # Wall-clock start for reporting; bookkeeping uses the monotonic clock.
+        # Outgoing timestamps are wall time derived from one monotonic read.
         self.connection_start_time = time.time()
+        self.connection_start_mono = time.monotonic()
+        self._wall_offset = self.connection_start_time - self.connection_start_mono
+        self.last_activity_mono = self.connection_start_mono
         self.session_data = {}
         self.active_requests = {}
+        self.use_msgpack = False
+        # Send/disconnect counters for this client, reported with get_metrics
+        self.monitor = create_connection_monitor(client_id)
+        
+        # Outbound frames are written by a single writer task (started on first send)
+        self._out_queue = deque()
+        # REPLACEABLE_MESSAGE_TYPES type -> queue slot [frame, seq] (frame None once written)
+        self._latest = {}
+        self._writer_wake: Optional[asyncio.Future] = None
+        self._drained: Optional[asyncio.Future] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._writer_error: Optional[Exception] = None
+        # TCP socket to cork while a backlog of frames is written (Linux only)
+        self._cork_sock = corkable_socket(websocket)
         
     async def send(self, message):
-        """Enhanced send with metrics tracking and error handling."""
+        """
+        Enhanced send with metrics tracking and error handling.
+        
+        The frame is queued for the writer task rather than written inline, so
+        producers (e.g. audio streaming) run ahead of the socket. A failed write
+        is re-raised on the next send; once OUTBOUND_QUEUE_LIMIT frames are
+        pending the caller waits for the writer to catch up.
+        
+        Dict messages are stamped with a per-connection "seq" in wire order, so
+        clients can detect a missing message. A REPLACEABLE_MESSAGE_TYPES frame
+        that overwrites an unsent one takes over its queue position and seq.
+        """
         try:
-            if isinstance(message, str):
-                data = json.loads(message)
-            else:
-                data = message
-                message = json.dumps(message)
+            if self._writer_error is not None:
+                raise self._writer_error
             
-            # Add client_id and timestamp to all messages
-            if isinstance(data, dict):
-                data["client_id"] = self.client_id
-                data["timestamp"] = time.time()
-                message = json.dumps(data)
+            now = time.monotonic()
+            slot = None
+            if isinstance(message, dict):
+                if message.get("type") in REPLACEABLE_MESSAGE_TYPES:
+                    slot = self._latest_slot(message["type"])
+                    seq = slot[1]
+                else:
+                    seq = next(self.monitor.next_seq)
+                # Add client_id, timestamp and seq and serialize once; decode so
+                # clients still receive a text frame they can JSON.parse
+                message["client_id"] = self.client_id
+                message["timestamp"] = self._wall_offset + now
+                message["seq"] = seq
+                message = self.encode(message)
+            elif not isinstance(message, (str, bytes, bytearray)):
+                message = orjson.dumps(message, option=_ORJSON_OPTIONS).decode()
+            # Pre-serialized str frames and binary (bytes) frames are sent as-is
             
             # Track message metrics
             self.message_count += 1
-            self.last_activity = time.time()
+            self.last_activity_mono = now
             
-            await self.websocket.send(message)
+            if slot is None:
+                await self._enqueue(message)
+            elif slot[0] is not None:
+                # An unsent frame of this type is still queued - overwrite it
+                slot[0] = message
+                self.monitor.coalesced_chunks += 1
+            else:
+                slot[0] = message
+                await self._enqueue(slot)
             
-        except ConnectionClosed as e:
-            log_disconnection(self.client_id, e, "while sending message")
+        except ConnectionClosed:
+            # Already logged by the writer task
             raise
         except Exception as e:
             log(f"Error sending message to {self.client_id}: {e}")
             raise
     
+    def encode(self, message: dict):
+        """Serialize a message in the negotiated wire format (msgpack binary or JSON text)."""
+        if self.use_msgpack:
+            return MSGPACK_FRAME_PREFIX + _msgpack_encoder.encode(message)
+        return orjson.dumps(message, option=_ORJSON_OPTIONS).decode()
+    
+    async def send_raw(self, payload):
+        """
+        Queue an already-serialized frame (str for text, bytes for binary).
+        
+        Fast path for high-frequency messages such as audio chunks: no
+        client_id/timestamp stamping and no type checks.
+        """
+        if self._writer_error is not None:
+            raise self._writer_error
+        
+        self.message_count += 1
+        self.last_activity_mono = time.monotonic()
+        await self._enqueue(payload)
+    
+    async def _enqueue(self, frame):
+        """Hand a frame to the writer task, waiting if too many are pending."""
+        self._out_queue.append(frame)
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        elif self._writer_wake is not None and not self._writer_wake.done():
+            self._writer_wake.set_result(None)
+        
+        if len(self._out_queue) >= OUTBOUND_QUEUE_LIMIT:
+            await self.flush()
+    
+    def _latest_slot(self, msg_type: str) -> list:
+        """
+        Return the queue slot ([frame, seq]) for a REPLACEABLE_MESSAGE_TYPES type:
+        the one still waiting for the writer, or a new empty one.
+        """
+        slot = self._latest.get(msg_type)
+        if slot is None or slot[0] is None:
+            slot = self._latest[msg_type] = [None, next(self.monitor.next_seq)]
+        return slot
+    
+    async def _write_next(self):
+        """Write the oldest queued frame once the transport has write credit."""
+        frame = self._out_queue.popleft()
+        if type(frame) is list:
+            # Replaceable-type slot - take its newest frame and mark it written
+            slot = frame
+            frame, slot[0] = slot[0], None
+        # A client closed as stuck makes the send below raise ConnectionClosed
+        await wait_for_write_credit(self.websocket, self.client_id)
+        await self.websocket.send(frame)
+        self.monitor.record_chunk_sent(len(frame))
+    
+    async def _writer_loop(self):
+        """Write queued frames in order until the connection fails or the writer is stopped."""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if not self._out_queue:
+                    if self._drained is not None and not self._drained.done():
+                        self._drained.set_result(None)
+                    self._writer_wake = loop.create_future()
+                    await self._writer_wake
+                    continue
+                
+                if self._cork_sock is not None and len(self._out_queue) > 1:
+                    await self._write_corked(len(self._out_queue))
+                else:
+                    await self._write_next()
+                
+        except ConnectionClosed as e:
+            self._writer_error = e
+            self.monitor.record_disconnection(e, log_disconnection(self.client_id, e, "while sending message"))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._writer_error = e
+            log(f"Error sending message to {self.client_id}: {e}")
+        finally:
+            self._out_queue.clear()
+            if self._drained is not None and not self._drained.done():
+                self._drained.set_result(None)
+    
+    async def _write_corked(self, count: int):
+        """
+        Write the next count queued frames with the socket corked, so the kernel
+        packs them into full segments instead of one small packet per frame.
+        """
+        sock = self._cork_sock
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 1)
+        try:
+            for _ in range(count):
+                await self._write_next()
+        finally:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 0)
+            except OSError:
+                pass  # Socket already closed
+    
+    async def flush(self):
+        """Wait until every queued frame has been written."""
+        if self._out_queue and self._writer_task is not None and not self._writer_task.done():
+            if self._drained is None or self._drained.done():
+                self._drained = asyncio.get_running_loop().create_future()
+            await self._drained
+        
+        if self._writer_error is not None:
+            raise self._writer_error
+    
+    async def stop_writer(self):
+        """Cancel the writer task, dropping anything still queued, and release the monitor."""
+        self.monitor.release()
+        if self._writer_task is not None and not self._writer_task.done():
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+    
+    @property
+    def last_activity(self) -> float:
+        """Wall-clock time of the last send/receive."""
+        return self._wall_offset + self.last_activity_mono
+    
     async def recv(self):
         """Enhanced receive with activity tracking."""
         try:
             message = await self.websocket.recv()
-            self.last_activity = time.time()
+            self.last_activity_mono = time.monotonic()
             return message
             
         except ConnectionClosed as e:
@@ -131,28 +594,77 @@ class ProfAIWebSocketWrapper:
     
     async def close(self):
         """Enhanced close with cleanup."""
+        session_duration = time.monotonic() - self.connection_start_mono
+        log(f"Session metrics for {self.client_id}: {self.message_count} messages, "
+            f"{session_duration:.1f}s, last activity {self.last_activity:.0f}")
         try:
-            # Send final metrics before closing
-            session_duration = time.time() - self.connection_start_time
-            await self.send({
-                "type": "connection_closing",
-                "session_metrics": {
-                    "total_messages": self.message_count,
-                    "session_duration": session_duration,
-                    "last_activity": self.last_activity
-                }
-            })
+            # Deliver frames already queued, then close
+            await self.flush()
             await self.websocket.close()
-        except:
+        except Exception:
             pass  # Ignore errors during cleanup
+        finally:
+            await self.stop_writer()
+
+# Course served when no course file or document service is available. Built once
+# and shared by every agent - handlers only read it.
+_FALLBACK_COURSE = {
+    "course_id": "fallback_course",
+    "course_title": "Sample Educational Course",
+    "modules": [
+        {
+            "title": "Introduction to Learning",
+            "sub_topics": [
+                {
+                    "title": "Getting Started",
+                    "content": "Welcome to this educational journey. In this introduction, we will explore the fundamentals of learning and how to make the most of your educational experience. Learning is a continuous process that involves acquiring new knowledge, skills, and understanding through study, experience, or teaching."
+                },
+                {
+                    "title": "Study Methods", 
+                    "content": "Effective study methods are crucial for academic success. Some proven techniques include active reading, note-taking, spaced repetition, and practice testing. These methods help improve retention and understanding of the material."
+                }
+            ]
+        },
+        {
+            "title": "Core Concepts",
+            "sub_topics": [
+                {
+                    "title": "Fundamental Principles",
+                    "content": "Understanding fundamental principles is essential for building a strong foundation in any subject. These principles serve as the building blocks for more advanced concepts and applications."
+                }
+            ]
+        }
+    ]
+}
 
 class ProfAIAgent:
     """
     ProfAI WebSocket agent that handles educational content delivery with low latency.
     """
+    
+    # Static shape of per-chunk audio messages; copied and filled in per chunk
+    _AUDIO_CHUNK_TEMPLATE = {
+        "type": "audio_chunk",
+        "chunk_id": 0,
+        "audio_data": "",
+        "size": 0,
+        "is_first_chunk": False,
+        "request_id": ""
+    }
+    _AUDIO_CHUNK_HEADER_TEMPLATE = {
+        "type": "audio_chunk_header",
+        "chunk_id": 0,
+        "size": 0,
+        "is_first_chunk": False,
+        "request_id": ""
+    }
+    
     def __init__(self, websocket_wrapper: ProfAIWebSocketWrapper):
         self.websocket = websocket_wrapper
         self.client_id = websocket_wrapper.client_id
+        # Underlying connection and its open-check, resolved once
+        self._raw_ws = getattr(websocket_wrapper, 'websocket', websocket_wrapper)
+        self._conn_probe = connection_probe(self._raw_ws)
         
         # Initialize services with error handling
         self.services_available = {}
@@ -183,21 +695,43 @@ class ProfAIAgent:
             self.teaching_service = None
             self.services_available["teaching"] = False
         
+        # Availability never changes after init - keep it as plain attributes
+        self._chat_ok = self.services_available["chat"]
+        self._audio_ok = self.services_available["audio"]
+        self._teaching_ok = self.services_available["teaching"]
+        
         # Performance tracking
-        self.conversation_metrics = {
-            "total_requests": 0,
-            "avg_response_time": 0.0,
-            "total_response_time": 0.0,
-            "chat_requests": 0,
-            "audio_requests": 0,
-            "teaching_requests": 0,
-            "errors": 0
-        }
+        self.conversation_metrics = ConversationMetrics()
         
         # Session state
-        self.session_start_time = time.time()
+        self.session_start_ns = time.monotonic_ns()
         self.current_language = "en-IN"
         self.current_course_context = None
+        # Audio chunks go out as base64 JSON unless the client opts into
+        # binary frames with {"type": "set_audio_transport", "transport": "binary"}
+        # (header message + binary frame) or "compact" (3-byte header in the binary frame)
+        self.audio_transport = "base64"
+        # request_id the cached JSON audio-chunk tail was built for
+        self._chunk_request_id = None
+        self._chunk_json_tail = ""
+        
+        # Frames that never change for this connection, serialized once. The
+        # ready frame is always JSON (no wire format has been negotiated yet).
+        self._ready_frame = orjson.dumps({
+            "type": "connection_ready",
+            "message": "ProfAI WebSocket connected successfully",
+            "client_id": self.client_id,
+            "services": self.services_available,
+            "wire_formats": WIRE_FORMATS,
+            "audio_transports": AUDIO_TRANSPORTS,
+            "timestamp": time.time()
+        }).decode()
+        # Pong is this prefix plus the varying server_time/timestamp
+        self._pong_prefix = orjson.dumps({
+            "type": "pong",
+            "message": "Connection alive",
+            "client_id": self.client_id
+        }).decode()[:-1] + ',"server_time":'
         
         log(f"ProfAI agent initialized for client {self.client_id} - Services: {self.services_available}")
 
@@ -208,18 +742,16 @@ class ProfAIAgent:
         try:
             log(f"Starting message processing for client {self.client_id}")
             
-            # Send connection ready message
-            await self.websocket.send({
-                "type": "connection_ready",
-                "message": "ProfAI WebSocket connected successfully",
-                "client_id": self.client_id,
-                "services": self.services_available
-            })
+            # Send connection ready message (pre-serialized in __init__)
+            await self.websocket.send(self._ready_frame)
             
             while True:
                 try:
                     message = await self.websocket.recv()
-                    data = json.loads(message)
+                    if len(message) > DECODE_OFFLOAD_BYTES:
+                        data = await asyncio.to_thread(decode_message, message)
+                    else:
+                        data = decode_message(message)
                     
                     message_type = data.get("type")
                     if not message_type:
@@ -232,33 +764,22 @@ class ProfAIAgent:
                     log(f"Processing message type: {message_type} for client {self.client_id}")
                     
                     # Route messages to appropriate handlers
-                    if message_type == "ping":
-                        await self.handle_ping(data)
-                    elif message_type == "chat_with_audio":
-                        await self.handle_chat_with_audio(data)
-                    elif message_type == "start_class":
-                        await self.handle_start_class(data)
-                    elif message_type == "audio_only":
-                        await self.handle_audio_only(data)
-                    elif message_type == "transcribe_audio":
-                        await self.handle_transcribe_audio(data)
-                    elif message_type == "set_language":
-                        await self.handle_set_language(data)
-                    elif message_type == "get_metrics":
-                        await self.handle_get_metrics(data)
-                    else:
+                    handler = self._HANDLERS.get(message_type)
+                    if handler is None:
                         await self.websocket.send({
                             "type": "error",
                             "error": f"Unknown message type: {message_type}"
                         })
+                    else:
+                        await handler(self, data)
                     
                 except ConnectionClosed as e:
-                    log_disconnection(self.client_id, e, "during message processing")
+                    normal = log_disconnection(self.client_id, e, "during message processing")
                     # Don't count normal disconnections as errors
-                    if not is_normal_closure(e):
-                        self.conversation_metrics["errors"] += 1
+                    if not normal:
+                        self.conversation_metrics.errors += 1
                     break
-                except json.JSONDecodeError:
+                except _DECODE_ERRORS:
                     await self.websocket.send({
                         "type": "error",
                         "error": "Invalid JSON message"
@@ -281,26 +802,32 @@ class ProfAIAgent:
 
     async def handle_ping(self, data: dict):
         """Handle ping messages for connection testing."""
-        await self.websocket.send({
-            "type": "pong",
-            "message": "Connection alive",
-            "server_time": time.time()
-        })
+        if self.websocket.use_msgpack:
+            await self.websocket.send({
+                "type": "pong",
+                "message": "Connection alive",
+                "server_time": time.time()
+            })
+            return
+        
+        now = repr(time.time())
+        await self.websocket.send(f'{self._pong_prefix}{now},"timestamp":{now}}}')
 
     async def handle_chat_with_audio(self, data: dict):
         """Handle chat requests with automatic audio generation - optimized for low latency."""
-        request_start_time = time.time()
+        request_start_ns = time.monotonic_ns()
         
         try:
+            request_id = data.get("request_id", "")
             # Enhanced service availability check
-            if not self.services_available.get("chat", False):
+            if not self._chat_ok:
                 await self.websocket.send({
                     "type": "error", 
                     "error": "Chat service not available - please refresh connection"
                 })
                 return
                 
-            if not self.services_available.get("audio", False):
+            if not self._audio_ok:
                 await self.websocket.send({
                     "type": "error",
                     "error": "Audio service not available - please refresh connection"  
@@ -324,18 +851,19 @@ class ProfAIAgent:
             await self.websocket.send({
                 "type": "processing_started",
                 "message": "Generating response...",
-                "request_id": data.get("request_id", ""),
+                "request_id": request_id,
                 "timestamp": time.time()
             })
             
+            # Open the TTS connection while the LLM is still generating
+            self.audio_service.prewarm_stream()
+            
             # Get text response with enhanced error handling
             response_text = ""
             try:
                 
-                response_data = await asyncio.wait_for(
-                    self.chat_service.ask_question(query, language),
-                    timeout=30.0  # Increased timeout for better reliability
-                )
+                async with asyncio.timeout(30.0):  # Increased timeout for better reliability
+                    response_data = await self.chat_service.ask_question(query, language)
                 response_text = response_data.get('answer') or response_data.get('response', '')
                 
                 if not response_text:
@@ -351,7 +879,7 @@ class ProfAIAgent:
                     "type": "text_response",
                     "text": response_text,
                     "metadata": response_data,
-                    "request_id": data.get("request_id", ""),
+                    "request_id": request_id,
                     "timestamp": time.time()
                 })
                 
@@ -386,35 +914,32 @@ class ProfAIAgent:
             
             try:
                 # OPTIMIZED streaming for sub-300ms latency (consistent with start_class)
-                audio_start_time = time.time()
+                audio_start_ns = time.monotonic_ns()
                 chunk_count = 0
                 total_audio_size = 0
                 first_chunk_sent = False
+                # Per-frame stats, logged once as a summary when the stream ends
+                frame_sizes = []
+                frame_times_ns = []
                 
                 log(f"🚀 Starting REAL-TIME class audio streaming for: {response_text[:50]}...")
                 
-                async for audio_chunk in self.audio_service.stream_audio_from_text(response_text, language, self.websocket):
+                # First chunk goes out immediately; later small chunks are merged
+                audio_stream = self.audio_service.stream_audio_from_text(response_text, language, self.websocket)
+                async for audio_chunk, chunk_ids in self._while_connected(coalesce_audio_chunks(audio_stream)):
                     if audio_chunk and len(audio_chunk) > 0:
-                        chunk_count += 1
+                        chunk_count = chunk_ids[-1]
                         total_audio_size += len(audio_chunk)
                         
-                        # Convert to base64 for JSON transmission
-                        import base64
-                        audio_base64 = base64.b64encode(audio_chunk).decode('utf-8')
-                        
-                        # Send chunk immediately
-                        await self.websocket.send({
-                            "type": "audio_chunk",
-                            "chunk_id": chunk_count,
-                            "audio_data": audio_base64,
-                            "size": len(audio_chunk),
-                            "is_first_chunk": not first_chunk_sent,
-                            "request_id": data.get("request_id", "")
-                        })
+                        await self._send_audio_chunk(
+                            audio_chunk, chunk_ids[0], not first_chunk_sent, request_id, chunk_ids
+                        )
+                        frame_sizes.append(len(audio_chunk))
+                        frame_times_ns.append(time.monotonic_ns())
                         
                         # Log first chunk latency (CRITICAL METRIC - consistent with start_class)
                         if not first_chunk_sent:
-                            first_audio_latency = (time.time() - audio_start_time) * 1000
+                            first_audio_latency = (time.monotonic_ns() - audio_start_ns) / 1e6
                             log(f"🎯 FIRST CHAT AUDIO CHUNK delivered in {first_audio_latency:.0f}ms")
                             
                             if first_audio_latency <= 300:
@@ -425,34 +950,31 @@ class ProfAIAgent:
                                 log(f"⚠️ HIGH latency: {first_audio_latency:.0f}ms (needs optimization)")
                             
                             first_chunk_sent = True
-                        else:
-                            # Log subsequent chunks
-                            chunk_time = (time.time() - audio_start_time) * 1000
-                            log(f"   Chunk {chunk_count}: {len(audio_chunk)} bytes at {chunk_time:.0f}ms")
                 
                 # Send completion message (consistent with start_class)
                 await self.websocket.send({
                     "type": "audio_generation_complete",
                     "total_chunks": chunk_count,
                     "total_size": total_audio_size,
-                    "first_chunk_latency": (time.time() - audio_start_time) * 1000 if first_chunk_sent else 0,
+                    "first_chunk_latency": first_audio_latency if first_chunk_sent else 0,
                     "message": "Chat audio ready to play!",
-                    "request_id": data.get("request_id", "")
+                    "request_id": request_id
                 })
                 
-                audio_total_time = (time.time() - audio_start_time) * 1000
+                audio_total_time = (time.monotonic_ns() - audio_start_ns) / 1e6
                 log(f"🏁 Chat audio streaming complete: {chunk_count} chunks, {total_audio_size} bytes in {audio_total_time:.0f}ms")
+                log(f"   Frames: {summarize_audio_frames(frame_sizes, frame_times_ns)}")
                 
             except ConnectionClosed as e:
-                log_disconnection(self.client_id, e, "during chat audio streaming")
-                if is_normal_closure(e):
+                normal = log_disconnection(self.client_id, e, "during chat audio streaming")
+                if normal:
                     log(f"🔌 Client disconnected normally - chat audio streaming completed")
                 else:
                     log(f"❌ Chat audio streaming interrupted by connection error")
-                    self.conversation_metrics["errors"] += 1
+                    self.conversation_metrics.errors += 1
             except Exception as e:
                 log(f"❌ Chat audio generation error: {e}")
-                self.conversation_metrics["errors"] += 1
+                self.conversation_metrics.errors += 1
                 try:
                     await self.websocket.send({
                         "type": "error",
@@ -463,26 +985,18 @@ class ProfAIAgent:
                     return
             
             # Update metrics
-            total_time = time.time() - request_start_time
-            self.conversation_metrics["total_requests"] += 1
-            self.conversation_metrics["chat_requests"] += 1
-            self.conversation_metrics["total_response_time"] += total_time
-            self.conversation_metrics["avg_response_time"] = (
-                self.conversation_metrics["total_response_time"] / 
-                self.conversation_metrics["total_requests"]
-            )
-            
-            log(f"Chat with audio completed in {total_time:.2f}s")
+            elapsed_ns = self._record_request("chat", request_start_ns)
+            log(f"Chat with audio completed in {elapsed_ns / 1e9:.2f}s")
             
         except ConnectionClosed as e:
-            log_disconnection(self.client_id, e, "during chat with audio")
-            if not is_normal_closure(e):
-                self.conversation_metrics["errors"] += 1
+            normal = log_disconnection(self.client_id, e, "during chat with audio")
+            if not normal:
+                self.conversation_metrics.errors += 1
             # Don't try to send error message if connection is closed
             return
         except Exception as e:
             log(f"❌ Error in chat with audio: {e}")
-            self.conversation_metrics["errors"] += 1
+            self.conversation_metrics.errors += 1
             try:
                 await self.websocket.send({
                     "type": "error",
@@ -494,9 +1008,10 @@ class ProfAIAgent:
 
     async def handle_start_class(self, data: dict):
         """Handle class start requests with optimized content delivery and timeout handling."""
-        request_start_time = time.time()
+        request_start_ns = time.monotonic_ns()
         
         try:
+            request_id = data.get("request_id", "")
             course_id = data.get("course_id")
             module_index = data.get("module_index", 0)
             sub_topic_index = data.get("sub_topic_index", 0)
@@ -511,12 +1026,11 @@ class ProfAIAgent:
                 "course_id": course_id,
                 "module_index": module_index,
                 "sub_topic_index": sub_topic_index,
-                "request_id": data.get("request_id", "")
+                "request_id": request_id
             })
             
             # Load and validate course content with timeout
             try:
-                import os
                 if not os.path.exists(config.OUTPUT_JSON_PATH):
                     await self.websocket.send({
                         "type": "error",
@@ -525,10 +1039,8 @@ class ProfAIAgent:
                     return
                 
                 # Load course data with timeout protection - pass course_id for proper loading
-                course_data = await asyncio.wait_for(
-                    self._load_course_data_async(course_id),
-                    timeout=30.0  # 3 second timeout for file loading
-                )
+                async with asyncio.timeout(30.0):  # 30 second timeout for file loading
+                    course_data = await self._load_course_data_async(course_id)
                 
                 # Validate indices
                 if module_index >= len(course_data.get("modules", [])):
@@ -555,7 +1067,7 @@ class ProfAIAgent:
                     "module_title": module['title'],
                     "sub_topic_title": sub_topic['title'],
                     "message": "Content loaded, generating teaching material...",
-                    "request_id": data.get("request_id", "")
+                    "request_id": request_id
                 })
                 
                 log(f"Course content loaded: {module['title']} -> {sub_topic['title']}")
@@ -587,7 +1099,7 @@ class ProfAIAgent:
                     log(f"Truncated content to 7500 chars for faster processing")
                 
                 # Check if teaching service is available
-                if not self.services_available.get("teaching", False):
+                if not self._teaching_ok:
                     log("Teaching service not available, using direct content")
                     teaching_content = self._create_simple_teaching_content(
                         module['title'], sub_topic['title'], raw_content
@@ -595,15 +1107,13 @@ class ProfAIAgent:
                 else:
                     # Try to generate with reduced timeout
                     try:
-                        teaching_content = await asyncio.wait_for(
-                            self.teaching_service.generate_teaching_content(
+                        async with asyncio.timeout(6.0):  # Reduced to 6 seconds
+                            teaching_content = await self.teaching_service.generate_teaching_content(
                                 module_title=module['title'],
                                 sub_topic_title=sub_topic['title'],
                                 raw_content=raw_content,
                                 language=language
-                            ),
-                            timeout=6.0  # Reduced to 6 seconds
-                        )
+                            )
                     except asyncio.TimeoutError:
                         log("Teaching content generation timeout, using fallback")
                         teaching_content = self._create_simple_teaching_content(
@@ -622,7 +1132,7 @@ class ProfAIAgent:
                     "content": teaching_content[:500] + "..." if len(teaching_content) > 500 else teaching_content,
                     "content_length": len(teaching_content),
                     "message": "Teaching content ready, starting audio...",
-                    "request_id": data.get("request_id", "")
+                    "request_id": request_id
                 })
                 
                 log(f"Teaching content ready: {len(teaching_content)} characters")
@@ -639,7 +1149,7 @@ class ProfAIAgent:
                     "content": teaching_content[:500] + "..." if len(teaching_content) > 500 else teaching_content,
                     "content_length": len(teaching_content),
                     "message": "Using fallback content, starting audio...",
-                    "request_id": data.get("request_id", "")
+                    "request_id": request_id
                 })
             
             # Generate audio with streaming
@@ -650,35 +1160,32 @@ class ProfAIAgent:
             
             try:
                 # OPTIMIZED streaming for sub-300ms latency (consistent with chat_with_audio)
-                audio_start_time = time.time()
+                audio_start_ns = time.monotonic_ns()
                 chunk_count = 0
                 total_audio_size = 0
                 first_chunk_sent = False
+                # Per-frame stats, logged once as a summary when the stream ends
+                frame_sizes = []
+                frame_times_ns = []
                 
                 log(f"🚀 Starting REAL-TIME class audio streaming for: {teaching_content[:50]}...")
                 
-                async for audio_chunk in self.audio_service.stream_audio_from_text(teaching_content, language, self.websocket):
+                # First chunk goes out immediately; later small chunks are merged
+                audio_stream = self.audio_service.stream_audio_from_text(teaching_content, language, self.websocket)
+                async for audio_chunk, chunk_ids in self._while_connected(coalesce_audio_chunks(audio_stream)):
                     if audio_chunk and len(audio_chunk) > 0:
-                        chunk_count += 1
+                        chunk_count = chunk_ids[-1]
                         total_audio_size += len(audio_chunk)
                         
-                        # Convert to base64 for JSON transmission
-                        import base64
-                        audio_base64 = base64.b64encode(audio_chunk).decode('utf-8')
-                        
-                        # Send chunk immediately
-                        await self.websocket.send({
-                            "type": "audio_chunk",
-                            "chunk_id": chunk_count,
-                            "audio_data": audio_base64,
-                            "size": len(audio_chunk),
-                            "is_first_chunk": not first_chunk_sent,
-                            "request_id": data.get("request_id", "")
-                        })
+                        await self._send_audio_chunk(
+                            audio_chunk, chunk_ids[0], not first_chunk_sent, request_id, chunk_ids
+                        )
+                        frame_sizes.append(len(audio_chunk))
+                        frame_times_ns.append(time.monotonic_ns())
                         
                         # Log first chunk latency (CRITICAL METRIC - consistent with chat)
                         if not first_chunk_sent:
-                            first_audio_latency = (time.time() - audio_start_time) * 1000
+                            first_audio_latency = (time.monotonic_ns() - audio_start_ns) / 1e6
                             log(f"🎯 FIRST CLASS AUDIO CHUNK delivered in {first_audio_latency:.0f}ms")
                             
                             if first_audio_latency <= 300:
@@ -689,34 +1196,31 @@ class ProfAIAgent:
                                 log(f"⚠️ HIGH latency: {first_audio_latency:.0f}ms (needs optimization)")
                             
                             first_chunk_sent = True
-                        else:
-                            # Log subsequent chunks
-                            chunk_time = (time.time() - audio_start_time) * 1000
-                            log(f"   Chunk {chunk_count}: {len(audio_chunk)} bytes at {chunk_time:.0f}ms")
                 
                 # Send completion message (consistent completion type)
                 await self.websocket.send({
                     "type": "audio_generation_complete",
                     "total_chunks": chunk_count,
                     "total_size": total_audio_size,
-                    "first_chunk_latency": (time.time() - audio_start_time) * 1000 if first_chunk_sent else 0,
+                    "first_chunk_latency": first_audio_latency if first_chunk_sent else 0,
                     "message": "Class audio ready to play!",
-                    "request_id": data.get("request_id", "")
+                    "request_id": request_id
                 })
                 
-                audio_total_time = (time.time() - audio_start_time) * 1000
+                audio_total_time = (time.monotonic_ns() - audio_start_ns) / 1e6
                 log(f"🏁 Class audio streaming complete: {chunk_count} chunks, {total_audio_size} bytes in {audio_total_time:.0f}ms")
+                log(f"   Frames: {summarize_audio_frames(frame_sizes, frame_times_ns)}")
                 
             except ConnectionClosed as e:
-                log_disconnection(self.client_id, e, "during class audio streaming")
-                if is_normal_closure(e):
+                normal = log_disconnection(self.client_id, e, "during class audio streaming")
+                if normal:
                     log(f"🔌 Client disconnected normally - class audio streaming completed")
                 else:
                     log(f"❌ Class audio streaming interrupted by connection error")
-                    self.conversation_metrics["errors"] += 1
+                    self.conversation_metrics.errors += 1
             except Exception as e:
                 log(f"❌ Class audio generation error: {e}")
-                self.conversation_metrics["errors"] += 1
+                self.conversation_metrics.errors += 1
                 try:
                     await self.websocket.send({
                         "type": "error",
@@ -727,20 +1231,12 @@ class ProfAIAgent:
                     return
             
             # Update metrics
-            total_time = time.time() - request_start_time
-            self.conversation_metrics["total_requests"] += 1
-            self.conversation_metrics["teaching_requests"] += 1
-            self.conversation_metrics["total_response_time"] += total_time
-            self.conversation_metrics["avg_response_time"] = (
-                self.conversation_metrics["total_response_time"] / 
-                self.conversation_metrics["total_requests"]
-            )
-            
-            log(f"Class start completed in {total_time:.2f}s")
+            elapsed_ns = self._record_request("teaching", request_start_ns)
+            log(f"Class start completed in {elapsed_ns / 1e9:.2f}s")
             
         except Exception as e:
             log(f"Error in start class: {e}")
-            self.conversation_metrics["errors"] += 1
+            self.conversation_metrics.errors += 1
             await self.websocket.send({
                 "type": "error",
                 "error": f"Class processing failed: {str(e)}"
@@ -748,9 +1244,10 @@ class ProfAIAgent:
 
     async def handle_audio_only(self, data: dict):
         """Handle audio-only generation requests."""
-        request_start_time = time.time()
+        request_start_ns = time.monotonic_ns()
         
         try:
+            request_id = data.get("request_id", "")
             text = data.get("text")
             language = data.get("language", self.current_language)
             
@@ -766,40 +1263,36 @@ class ProfAIAgent:
             await self.websocket.send({
                 "type": "audio_generation_started",
                 "message": "Generating audio...",
-                "request_id": data.get("request_id", "")
+                "request_id": request_id
             })
             
             try:
                 # OPTIMIZED streaming for sub-300ms latency (consistent with chat_with_audio)
-                audio_start_time = time.time()
+                audio_start_ns = time.monotonic_ns()
                 chunk_count = 0
                 total_audio_size = 0
                 first_chunk_sent = False
+                # Per-frame stats, logged once as a summary when the stream ends
+                frame_sizes = []
+                frame_times_ns = []
                 
                 log(f"🚀 Starting REAL-TIME audio-only streaming for: {text[:50]}...")
                 
-                async for audio_chunk in self.audio_service.stream_audio_from_text(text, language, self.websocket):
+                # First chunk goes out immediately; later small chunks are merged
+                async for audio_chunk, chunk_ids in self._while_connected(self._audio_clip_groups(text, language)):
                     if audio_chunk and len(audio_chunk) > 0:
-                        chunk_count += 1
+                        chunk_count = chunk_ids[-1]
                         total_audio_size += len(audio_chunk)
                         
-                        # Convert to base64 for JSON transmission
-                        import base64
-                        audio_base64 = base64.b64encode(audio_chunk).decode('utf-8')
-                        
-                        # Send chunk immediately
-                        await self.websocket.send({
-                            "type": "audio_chunk",
-                            "chunk_id": chunk_count,
-                            "audio_data": audio_base64,
-                            "size": len(audio_chunk),
-                            "is_first_chunk": not first_chunk_sent,
-                            "request_id": data.get("request_id", "")
-                        })
+                        await self._send_audio_chunk(
+                            audio_chunk, chunk_ids[0], not first_chunk_sent, request_id, chunk_ids
+                        )
+                        frame_sizes.append(len(audio_chunk))
+                        frame_times_ns.append(time.monotonic_ns())
                         
                         # Log first chunk latency (CRITICAL METRIC - consistent with chat)
                         if not first_chunk_sent:
-                            first_audio_latency = (time.time() - audio_start_time) * 1000
+                            first_audio_latency = (time.monotonic_ns() - audio_start_ns) / 1e6
                             log(f"🎯 FIRST AUDIO-ONLY CHUNK delivered in {first_audio_latency:.0f}ms")
                             
                             if first_audio_latency <= 300:
@@ -810,33 +1303,30 @@ class ProfAIAgent:
                                 log(f"⚠️ HIGH latency: {first_audio_latency:.0f}ms (needs optimization)")
                             
                             first_chunk_sent = True
-                        else:
-                            # Log subsequent chunks
-                            chunk_time = (time.time() - audio_start_time) * 1000
-                            log(f"   Chunk {chunk_count}: {len(audio_chunk)} bytes at {chunk_time:.0f}ms")
                 
                 # Send completion message
                 await self.websocket.send({
                     "type": "audio_generation_complete",
                     "total_chunks": chunk_count,
                     "total_size": total_audio_size,
-                    "first_chunk_latency": (time.time() - audio_start_time) * 1000 if first_chunk_sent else 0,
-                    "request_id": data.get("request_id", "")
+                    "first_chunk_latency": first_audio_latency if first_chunk_sent else 0,
+                    "request_id": request_id
                 })
                 
-                audio_total_time = (time.time() - audio_start_time) * 1000
+                audio_total_time = (time.monotonic_ns() - audio_start_ns) / 1e6
                 log(f"🏁 Audio-only streaming complete: {chunk_count} chunks, {total_audio_size} bytes in {audio_total_time:.0f}ms")
+                log(f"   Frames: {summarize_audio_frames(frame_sizes, frame_times_ns)}")
                 
             except ConnectionClosed as e:
-                log_disconnection(self.client_id, e, "during audio-only streaming")
-                if is_normal_closure(e):
+                normal = log_disconnection(self.client_id, e, "during audio-only streaming")
+                if normal:
                     log(f"🔌 Client disconnected normally - audio-only streaming completed")
                 else:
                     log(f"❌ Audio-only streaming interrupted by connection error")
-                    self.conversation_metrics["errors"] += 1
+                    self.conversation_metrics.errors += 1
             except Exception as e:
                 log(f"❌ Audio-only generation error: {e}")
-                self.conversation_metrics["errors"] += 1
+                self.conversation_metrics.errors += 1
                 try:
                     await self.websocket.send({
                         "type": "error",
@@ -847,44 +1337,135 @@ class ProfAIAgent:
                     return
             
             # Update metrics
-            total_time = time.time() - request_start_time
-            self.conversation_metrics["total_requests"] += 1
-            self.conversation_metrics["audio_requests"] += 1
-            self.conversation_metrics["total_response_time"] += total_time
-            self.conversation_metrics["avg_response_time"] = (
-                self.conversation_metrics["total_response_time"] / 
-                self.conversation_metrics["total_requests"]
-            )
-            
-            log(f"Audio-only completed in {total_time:.2f}s")
+            elapsed_ns = self._record_request("audio", request_start_ns)
+            log(f"Audio-only completed in {elapsed_ns / 1e9:.2f}s")
             
         except Exception as e:
             log(f"Error in audio-only: {e}")
-            self.conversation_metrics["errors"] += 1
+            self.conversation_metrics.errors += 1
             await self.websocket.send({
                 "type": "error",
                 "error": f"Audio processing failed: {str(e)}"
             })
 
+    async def _while_connected(self, groups):
+        """
+        Pass audio groups through until the client disconnects, then close the
+        source so TTS generation stops instead of producing audio nobody receives.
+        """
+        try:
+            async for group in groups:
+                if not self._conn_probe(self._raw_ws):
+                    log(f"🔌 Client {self.client_id} disconnected - stopping audio generation")
+                    break
+                yield group
+        finally:
+            await groups.aclose()
+    
+    async def _audio_clip_groups(self, text: str, language: str):
+        """
+        Yield coalesced (audio_bytes, chunk_ids) for text, like coalesce_audio_chunks.
+        
+        A clip generated before for the same text and language is replayed from
+        _AUDIO_CLIP_CACHE without calling TTS; a new clip is cached once it has
+        streamed completely (partial or failed streams are not kept).
+        """
+        key = (text, language)
+        groups = _AUDIO_CLIP_CACHE.get(key)
+        if groups is not None:
+            _AUDIO_CLIP_CACHE.move_to_end(key)
+            log(f"♻️ Replaying cached audio clip ({len(groups)} chunks)")
+            for group in groups:
+                yield group
+            return
+        
+        groups = []
+        clip_size = 0
+        audio_stream = self.audio_service.stream_audio_from_text(text, language, self.websocket)
+        source = coalesce_audio_chunks(audio_stream)
+        try:
+            async for audio_chunk, chunk_ids in source:
+                if clip_size <= AUDIO_CLIP_CACHE_MAX_BYTES:
+                    clip_size += len(audio_chunk)
+                    groups.append((bytes(audio_chunk), chunk_ids))
+                yield audio_chunk, chunk_ids
+        finally:
+            await source.aclose()
+        
+        if groups and clip_size <= AUDIO_CLIP_CACHE_MAX_BYTES:
+            _AUDIO_CLIP_CACHE[key] = groups
+            if len(_AUDIO_CLIP_CACHE) > AUDIO_CLIP_CACHE_ENTRIES:
+                _AUDIO_CLIP_CACHE.popitem(last=False)
+    
+    async def _send_audio_chunk(self, audio_chunk: bytes, chunk_id: int, is_first_chunk: bool,
+                                request_id: str, chunk_ids: Optional[list] = None):
+        """
+        Send one audio chunk as base64 JSON, as a header message plus a binary frame,
+        or as a single compact binary frame.
+        
+        chunk_ids lists the source chunks when several were merged into this one.
+        """
+        transport = self.audio_transport
+        if transport == "compact":
+            # request_id is announced once per response; each chunk only carries
+            # its id and flags, size is the frame length
+            if is_first_chunk:
+                await self.websocket.send_raw(self.websocket.encode({
+                    "type": "audio_stream_start",
+                    "request_id": request_id
+                }))
+            flags = AUDIO_FLAG_FIRST_CHUNK if is_first_chunk else 0
+            header = _COMPACT_AUDIO_HEADER.pack(chunk_id & 0xFFFF, flags)
+            if self.websocket.use_msgpack:
+                header = AUDIO_FRAME_PREFIX + header
+            await self.websocket.send_raw(header + audio_chunk)
+            return
+        
+        if transport == "base64" and not self.websocket.use_msgpack:
+            # Only chunk_id/size/flags/audio vary per chunk; the request_id tail
+            # is serialized once per request and the rest is formatted directly
+            if request_id != self._chunk_request_id:
+                self._chunk_request_id = request_id
+                self._chunk_json_tail = f',"request_id":{orjson.dumps(request_id).decode()}}}'
+            merged = ""
+            if chunk_ids is not None and len(chunk_ids) > 1:
+                merged = f',"chunks":[{",".join(map(str, chunk_ids))}]'
+            audio_b64 = base64.b64encode(audio_chunk).decode('ascii')
+            await self.websocket.send_raw(
+                f'{{"type":"audio_chunk","chunk_id":{chunk_id},"audio_data":"{audio_b64}",'
+                f'"size":{len(audio_chunk)},"is_first_chunk":{"true" if is_first_chunk else "false"}'
+                f'{merged}{self._chunk_json_tail}'
+            )
+            return
+        
+        if transport == "binary":
+            message = self._AUDIO_CHUNK_HEADER_TEMPLATE.copy()
+        else:
+            message = self._AUDIO_CHUNK_TEMPLATE.copy()
+        message["chunk_id"] = chunk_id
+        message["size"] = len(audio_chunk)
+        message["is_first_chunk"] = is_first_chunk
+        message["request_id"] = request_id
+        if chunk_ids is not None and len(chunk_ids) > 1:
+            message["chunks"] = chunk_ids
+        
+        # Audio chunks skip the wrapper's client_id/timestamp stamping
+        if transport == "binary":
+            # Header first; the next audio frame on the socket carries its bytes
+            await self.websocket.send_raw(self.websocket.encode(message))
+            if self.websocket.use_msgpack:
+                audio_chunk = AUDIO_FRAME_PREFIX + audio_chunk
+            await self.websocket.send_raw(audio_chunk)
+            return
+        
+        # msgpack carries raw bytes natively - no base64 needed
+        message["audio_data"] = bytes(audio_chunk)
+        await self.websocket.send_raw(self.websocket.encode(message))
+
     def _is_websocket_connected(self):
         """Safely check if WebSocket connection is still active."""
         try:
-            if not hasattr(self, 'websocket') or not self.websocket:
-                return False
-            
-            # Try different ways to check connection status
-            websocket_obj = getattr(self.websocket, 'websocket', None)
-            if websocket_obj:
-                # Check for closed attribute
-                if hasattr(websocket_obj, 'closed'):
-                    return not websocket_obj.closed
-                # Check for state attribute (websockets library)
-                if hasattr(websocket_obj, 'state'):
-                    # State 1 = OPEN, others are closed/closing
-                    return websocket_obj.state == 1
-            
-            # If we can't determine status, assume connected to continue processing
-            return True
+            return self._conn_probe(self._raw_ws)
             
         except Exception as e:
             log(f"Error checking WebSocket status: {e}")
@@ -894,15 +1475,13 @@ class ProfAIAgent:
     async def _load_course_data_async(self, course_id=None):
         """Load course data asynchronously with proper error handling."""
         try:
-            import os
-            import json
-            import config
-            
-            # Load from the same path as the HTTP endpoints use
-            if os.path.exists(config.OUTPUT_JSON_PATH):
-                with open(config.OUTPUT_JSON_PATH, 'r', encoding='utf-8') as f:
-                    loaded = json.load(f)
-                
+            # Load from the same path as the HTTP endpoints use (parsed once per file change)
+            try:
+                loaded, index = await _load_course_file(config.OUTPUT_JSON_PATH)
+            except FileNotFoundError:
+                loaded = None
+            
+            if loaded is not None:
                 # Handle both single course (dict) and multi-course (list) formats
                 course_obj = None
                 if isinstance(loaded, dict) and 'course_title' in loaded:
@@ -911,10 +1490,7 @@ class ProfAIAgent:
                 elif isinstance(loaded, list):
                     # Multi-course format: find by course_id if provided, else use first course
                     if course_id is not None:
-                        for c in loaded:
-                            if str(c.get("course_id", "")) == str(course_id):
-                                course_obj = c
-                                break
+                        course_obj = index.get(str(course_id))
                     # Fallback to first course if not found
                     if course_obj is None and len(loaded) > 0:
                         course_obj = loaded[0]
@@ -922,13 +1498,10 @@ class ProfAIAgent:
                     log(f"Invalid course data format in {config.OUTPUT_JSON_PATH}; using fallback")
                     return self._create_fallback_course_data()
 
-                # Ensure course_id is set if provided
+                # Ensure course_id is set if provided (on a copy - the parsed file is shared)
                 if course_obj is not None and course_id is not None:
-                    course_obj["course_id"] = course_id
+                    course_obj = {**course_obj, "course_id": course_id}
 
-                # Log safely
-                modules_len = len(course_obj.get('modules', [])) if isinstance(course_obj, dict) else 0
-                log(f"Course data loaded from {config.OUTPUT_JSON_PATH}: {modules_len} modules")
                 return course_obj
             
             # Try to load from the document service as secondary option
@@ -938,10 +1511,13 @@ class ProfAIAgent:
                     if courses_list and len(courses_list) > 0:
                         course = None
                         if course_id is not None:
-                            for c in courses_list:
-                                if str(c.get("course_id", "")) == str(course_id):
-                                    course = c
-                                    break
+                            # The list is fetched fresh each call - one pass with the
+                            # key converted once is as cheap as building an index
+                            wanted = str(course_id)
+                            course = next(
+                                (c for c in courses_list if str(c.get("course_id", "")) == wanted),
+                                None
+                            )
                         if course is None:
                             course = courses_list[0]
                         if course_id is not None:
@@ -959,40 +1535,28 @@ class ProfAIAgent:
             log(f"Error loading course data: {e}")
             return self._create_fallback_course_data()
     
+    def _record_request(self, kind: str, start_ns: int) -> int:
+        """Count a completed chat/teaching/audio request started at start_ns; returns its duration in ns."""
+        elapsed_ns = time.monotonic_ns() - start_ns
+        metrics = self.conversation_metrics
+        metrics.total_requests += 1
+        metrics.total_response_time_ns += elapsed_ns
+        if kind == "chat":
+            metrics.chat_requests += 1
+        elif kind == "teaching":
+            metrics.teaching_requests += 1
+        else:
+            metrics.audio_requests += 1
+        return elapsed_ns
+    
     def _create_fallback_course_data(self):
-        """Create fallback course data when files are not available."""
-        return {
-            "course_id": "fallback_course",
-            "course_title": "Sample Educational Course",
-            "modules": [
-                {
-                    "title": "Introduction to Learning",
-                    "sub_topics": [
-                        {
-                            "title": "Getting Started",
-                            "content": "Welcome to this educational journey. In this introduction, we will explore the fundamentals of learning and how to make the most of your educational experience. Learning is a continuous process that involves acquiring new knowledge, skills, and understanding through study, experience, or teaching."
-                        },
-                        {
-                            "title": "Study Methods", 
-                            "content": "Effective study methods are crucial for academic success. Some proven techniques include active reading, note-taking, spaced repetition, and practice testing. These methods help improve retention and understanding of the material."
-                        }
-                    ]
-                },
-                {
-                    "title": "Core Concepts",
-                    "sub_topics": [
-                        {
-                            "title": "Fundamental Principles",
-                            "content": "Understanding fundamental principles is essential for building a strong foundation in any subject. These principles serve as the building blocks for more advanced concepts and applications."
-                        }
-                    ]
-                }
-            ]
-        }
+        """Return the fallback course used when course files are not available (shared, read-only)."""
+        return _FALLBACK_COURSE
 
     async def handle_transcribe_audio(self, data: dict):
         """Handle audio transcription requests."""
         try:
+            request_id = data.get("request_id", "")
             audio_data = data.get("audio_data")  # Base64 encoded audio
             language = data.get("language", self.current_language)
             
@@ -1008,21 +1572,17 @@ class ProfAIAgent:
             await self.websocket.send({
                 "type": "transcription_started",
                 "message": "Transcribing audio...",
-                "request_id": data.get("request_id", "")
+                "request_id": request_id
             })
             
             try:
-                # Decode base64 audio data
-                import base64
-                import io
-                audio_bytes = base64.b64decode(audio_data)
+                # Decode base64 audio data off the event loop
+                audio_bytes = await asyncio.to_thread(base64.b64decode, audio_data)
                 audio_buffer = io.BytesIO(audio_bytes)
                 
-                # Transcribe audio
-                transcribed_text = await asyncio.wait_for(
-                    self.audio_service.transcribe_audio(audio_buffer, language),
-                    timeout=30.0  # 10 second timeout
-                )
+                # Transcribe audio (30 second timeout)
+                async with asyncio.timeout(30.0):
+                    transcribed_text = await self.audio_service.transcribe_audio(audio_buffer, language)
                 
                 if not transcribed_text:
                     await self.websocket.send({
@@ -1034,7 +1594,7 @@ class ProfAIAgent:
                 await self.websocket.send({
                     "type": "transcription_complete",
                     "transcribed_text": transcribed_text,
-                    "request_id": data.get("request_id", "")
+                    "request_id": request_id
                 })
                 
                 log(f"Transcription complete: {transcribed_text[:50]}...")
@@ -1087,10 +1647,72 @@ class ProfAIAgent:
                 "error": f"Language setting failed: {str(e)}"
             })
 
+    async def handle_set_audio_transport(self, data: dict):
+        """Handle audio transport selection (base64 JSON, binary or compact binary frames)."""
+        try:
+            transport = data.get("transport")
+            if transport not in AUDIO_TRANSPORTS:
+                await self.websocket.send({
+                    "type": "error",
+                    "error": f"Transport must be one of {', '.join(AUDIO_TRANSPORTS)}"
+                })
+                return
+            
+            self.audio_transport = transport
+            
+            await self.websocket.send({
+                "type": "audio_transport_set",
+                "transport": transport,
+                "request_id": data.get("request_id", "")
+            })
+            
+            log(f"Audio transport set to {transport} for client {self.client_id}")
+            
+        except Exception as e:
+            log(f"Error setting audio transport: {e}")
+            await self.websocket.send({
+                "type": "error",
+                "error": f"Audio transport setting failed: {str(e)}"
+            })
+
+    async def handle_set_wire_format(self, data: dict):
+        """
+        Handle wire format selection (JSON text frames or msgpack binary frames).
+        
+        With msgpack, audio frames of the binary/compact transports start with
+        AUDIO_FRAME_PREFIX and messages with MSGPACK_FRAME_PREFIX.
+        """
+        try:
+            wire_format = data.get("format")
+            if wire_format not in WIRE_FORMATS:
+                await self.websocket.send({
+                    "type": "error",
+                    "error": f"Format must be one of: {', '.join(WIRE_FORMATS)}"
+                })
+                return
+            
+            # Switch first so the confirmation already uses the new format
+            self.websocket.use_msgpack = wire_format == "msgpack"
+            
+            await self.websocket.send({
+                "type": "wire_format_set",
+                "format": wire_format,
+                "request_id": data.get("request_id", "")
+            })
+            
+            log(f"Wire format set to {wire_format} for client {self.client_id}")
+            
+        except Exception as e:
+            log(f"Error setting wire format: {e}")
+            await self.websocket.send({
+                "type": "error",
+                "error": f"Wire format setting failed: {str(e)}"
+            })
+
     async def handle_get_metrics(self, data: dict):
         """Handle metrics requests."""
         try:
-            session_duration = time.time() - self.session_start_time
+            session_duration = (time.monotonic_ns() - self.session_start_ns) / 1e9
             
             metrics = {
                 "session_metrics": {
@@ -1099,7 +1721,8 @@ class ProfAIAgent:
                     "current_language": self.current_language,
                     "message_count": self.websocket.message_count
                 },
-                "performance_metrics": self.conversation_metrics,
+                "performance_metrics": self.conversation_metrics.to_dict(),
+                "connection_metrics": self.websocket.monitor.get_metrics(),
                 "timestamp": time.time()
             }
             
@@ -1119,15 +1742,33 @@ class ProfAIAgent:
     async def cleanup(self):
         """Cleanup resources when connection closes."""
         try:
-            session_duration = time.time() - self.session_start_time
+            session_duration = (time.monotonic_ns() - self.session_start_ns) / 1e9
             log(f"Cleaning up client {self.client_id} after {session_duration:.2f}s")
             
             # Log final metrics
-            log(f"Final metrics for {self.client_id}: {self.conversation_metrics}")
+            log(f"Final metrics for {self.client_id}: {self.conversation_metrics.to_dict()}")
+            
+            # Close a prewarmed TTS connection that was never used
+            if self.audio_service:
+                await self.audio_service.disconnect()
             
         except Exception as e:
             log(f"Error during cleanup for {self.client_id}: {e}")
 
+    # Message type -> handler, shared by all agents (called as handler(self, data))
+    _HANDLERS = {
+        "ping": handle_ping,
+        "chat_with_audio": handle_chat_with_audio,
+        "start_class": handle_start_class,
+        "audio_only": handle_audio_only,
+        "transcribe_audio": handle_transcribe_audio,
+        "set_language": handle_set_language,
+        "set_audio_transport": handle_set_audio_transport,
+        "set_wire_format": handle_set_wire_format,
+        "get_metrics": handle_get_metrics
+    }
+
+
 async def websocket_handler(websocket, path=None):
     """
     Main WebSocket handler for ProfAI connections with improved error handling.
@@ -1141,7 +1782,9 @@ async def websocket_handler(websocket, path=None):
     except Exception:
         remote_address = "unknown"
     log(f"New client connected: {client_id} from {remote_address}")
+    tune_client_socket(websocket)
     
+    websocket_wrapper = None
     try:
         # Create enhanced websocket wrapper
         websocket_wrapper = ProfAIWebSocketWrapper(websocket, client_id)
@@ -1165,9 +1808,15 @@ async def websocket_handler(websocket, path=None):
         import traceback
         traceback.print_exc()
     finally:
+        if websocket_wrapper is not None:
+            await websocket_wrapper.stop_writer()
         connection_duration = time.time() - connection_start_time
         log(f"Connection handler finished for {client_id}. Total duration: {connection_duration:.2f}s")
 
+# Start of a ping as serialized by JSON.stringify, as text or bytes
+_PING_PREFIX = '{"type":"ping"'
+_PING_PREFIXES = (_PING_PREFIX, _PING_PREFIX.encode())
+
 async def basic_websocket_handler(websocket_wrapper: ProfAIWebSocketWrapper, client_id: str):
     """
     Basic WebSocket handler for when services are not available.
@@ -1186,10 +1835,26 @@ async def basic_websocket_handler(websocket_wrapper: ProfAIWebSocketWrapper, cli
         }
     })
     
+    # Pong is this prefix plus the varying server_time/timestamp
+    pong_prefix = orjson.dumps({
+        "type": "pong",
+        "message": "Connection alive (basic mode)",
+        "client_id": client_id
+    }).decode()[:-1] + ',"server_time":'
+    
     while True:
         try:
             message = await websocket_wrapper.recv()
-            data = json.loads(message)
+            # Pings (most of the traffic here) are answered without parsing
+            if message[:len(_PING_PREFIX)] in _PING_PREFIXES:
+                now = repr(time.time())
+                await websocket_wrapper.send(f'{pong_prefix}{now},"timestamp":{now}}}')
+                continue
+            
+            if len(message) > DECODE_OFFLOAD_BYTES:
+                data = await asyncio.to_thread(orjson.loads, message)
+            else:
+                data = orjson.loads(message)
             
             message_type = data.get("type")
             if not message_type:
@@ -1216,7 +1881,7 @@ async def basic_websocket_handler(websocket_wrapper: ProfAIWebSocketWrapper, cli
         except ConnectionClosed as e:
             log_disconnection(client_id, e, "in basic handler")
             break
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             await websocket_wrapper.send({
                 "type": "error",
                 "error": "Invalid JSON message"
@@ -1247,6 +1912,7 @@ async def start_websocket_server(host: str, port: int):
     }
     
     log(f"Starting ProfAI WebSocket server on {host}:{port}")
+    log(f"Event loop: {type(asyncio.get_running_loop()).__module__}")
     log("Features enabled: low-latency audio streaming, educational content delivery, performance optimization")
     
     try:
@@ -1275,12 +1941,23 @@ async def start_websocket_server(host: str, port: int):
         log(f"❌ Unexpected error starting WebSocket server: {e}")
         raise
 
+def run_event_loop(coro):
+    """
+    Run coro to completion on a new event loop, using uvloop when it is
+    installed and config.USE_UVLOOP is set.
+    
+    Only this loop is affected - the global event loop policy is left alone
+    so a host application (FastAPI/uvicorn) keeps its own loop choice.
+    """
+    loop_factory = uvloop.new_event_loop if (uvloop is not None and config.USE_UVLOOP) else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(coro)
+
 def main():
     """
     Main entry point for the ProfAI WebSocket server.
     """
     import argparse
-    import os
     
     parser = argparse.ArgumentParser(description='ProfAI WebSocket Server')
     parser.add_argument('--host', type=str, default=config.WEBSOCKET_HOST, help='Host to bind the server to')
@@ -1292,7 +1969,7 @@ def main():
     
     try:
         # Run the WebSocket server
-        asyncio.run(start_websocket_server(args.host, args.port))
+        run_event_loop(start_websocket_server(args.host, args.port))
     except KeyboardInterrupt:
         log("Server stopped by user")
     except Exception as e:
@@ -1303,7 +1980,7 @@ def main():
 def run_websocket_server_in_thread(host: str = "0.0.0.0", port: int = 8765):
     """Run WebSocket server in a separate thread for integration with Flask."""
     def run_server():
-        asyncio.run(start_websocket_server(host, port))
+        run_event_loop(start_websocket_server(host, port))
     
     thread = threading.Thread(target=run_server, daemon=True)
     thread.start()